@@ -1,11 +1,28 @@
 from __future__ import annotations
-from typing import List, Dict, Tuple, Optional
-import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, List, Dict, Sequence, Tuple, Optional
+import time
+
+from retrieval import (
+    BM25Index, ContractLocator, IncrementalBM25Index, IndexCache, InvertedIndex, PortfolioIndex, clause_snippet,
+    contract_locator, get_index_cache, tokenize
+)
+from segmenter import iter_segments
+
+NO_CLAUSES_ANSWER = "No relevant clauses found to answer this question."
+# IndexCache namespace of the BM25 indexes built by ``build_bm25_index``
+BM25_CACHE_NAMESPACE = "bm25-index"
+
 
 class Agent:
-    def __init__(self, llm_client):
+    def __init__(self, llm_client, index_cache: Optional[IndexCache] = None,
+                 incremental_index: Optional[IncrementalBM25Index] = None):
         """Initialize agent with LLM client for contract analysis."""
         self.llm = llm_client
+        # Shared across agents so repeated questions on the same contract skip index construction
+        self.index_cache = index_cache or get_index_cache()
+        # For a document being edited: each run re-indexes only the clauses that changed
+        self.incremental_index = incremental_index
 
     # --- Intent classification ---
     def classify(self, query: str) -> str:
@@ -32,22 +49,42 @@ class Agent:
             return ["classify", "retrieve", "synthesize"]
 
     # --- Answer synthesis ---
-    def answer(self, query: str, clauses: List[str], file_map: List[Tuple[str, int, int]] = None) -> str:
-        """Compose a grounded answer using the provided clauses."""
+    def answer(self, query: str, clauses: List[str], file_map: List[Tuple[str, int, int]] = None,
+               contracts: Optional[List[Optional[str]]] = None) -> str:
+        """
+        Compose a grounded answer using the provided clauses. ``contracts`` names
+        the contract of each clause; otherwise ``file_map`` ranges index ``clauses``.
+        """
         if not clauses:
-            return "No relevant clauses found to answer this question."
-        
-        # If we have file mapping information, use it to provide contract context
-        if file_map:
+            return NO_CLAUSES_ANSWER
+        return self._call_llm(self._answer_prompt(query, clauses, file_map, contracts))
+
+    def answer_stream(self, query: str, clauses: List[str], file_map: List[Tuple[str, int, int]] = None,
+                      contracts: Optional[List[Optional[str]]] = None) -> Iterator[str]:
+        """Streaming variant of ``answer``: yields text deltas as the LLM produces them."""
+        if not clauses:
+            yield NO_CLAUSES_ANSWER
+            return
+        prompt = self._answer_prompt(query, clauses, file_map, contracts)
+        if not hasattr(self.llm, "generate_response_stream"):
+            yield self._call_llm(prompt)
+            return
+        try:
+            yield from self.llm.generate_response_stream(prompt)
+        except Exception as e:
+            raise Exception(f"LLM error: {e}")
+
+    def _answer_prompt(self, query: str, clauses: List[str], file_map: List[Tuple[str, int, int]] = None,
+                       contracts: Optional[List[Optional[str]]] = None) -> str:
+        """Build the grounded-answer prompt for the retrieved clauses."""
+        if contracts is None and file_map:
+            locate = ContractLocator(file_map)
+            contracts = [locate(i) for i in range(len(clauses))]
+        # If we have contract information, use it to provide contract context
+        if contracts and any(contracts):
             context_parts = []
             for i, clause in enumerate(clauses):
-                # Find which contract this clause belongs to
-                contract_name = "Unknown Contract"
-                for contract_name, start_idx, end_idx in file_map:
-                    if start_idx <= i < end_idx:
-                        contract_name = contract_name
-                        break
-                
+                contract_name = contracts[i] or "Unknown Contract"
                 context_parts.append(f"[{i+1}] ({contract_name}) {clause}")
             
             context = "\n\n".join(context_parts)
@@ -65,81 +102,201 @@ class Agent:
                 f"Question: {query}\n\nClauses:\n{context}\n"
             )
         
-        return self._call_llm(prompt)
+        return prompt
 
     # --- Main orchestration method ---
-    def run(self, query: str, clauses: List[str], top_k: int = 5, file_map: List[Tuple[str, int, int]] = None) -> Dict[str, Any]:
+    def run(self, query: str, clauses: Sequence[str], top_k: int = 5, file_map: List[Tuple[str, int, int]] = None) -> Dict[str, Any]:
         """
         Orchestrate the complete agentic pipeline:
         1. classify → plan
         2. retrieve top-k clauses (BM25/keyword fallback)
         3. synthesize an answer grounded in those clauses
         4. optionally propose a safer clause
-        5. returns a structured dict: intent, steps, citations (with index/score/text), answer, proposal
+        5. returns a structured dict: intent, steps, citations (with index/score/text), answer, proposal, timings
+        
+        Steps 3 and 4 only depend on the retrieved clauses, so they run concurrently.
         """
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+        
         # Step 1: Classify intent and plan
         intent = self.classify(query)
         steps = self.plan(query)
+        timings["classify"] = time.perf_counter() - started
         
         # Step 2: Retrieve relevant clauses
+        step_started = time.perf_counter()
+        retrieved_clauses, citations = self._retrieve(query, clauses, top_k, file_map)
+        timings["retrieve"] = time.perf_counter() - step_started
+        
+        # Steps 3 and 4: grounded answer and (optionally) safer clause, in parallel
+        wants_proposal = self._wants_proposal(intent, query)
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="agent-step", initializer=_attach_script_context, initargs=(_current_script_context(),)) as pool:
+            answer_future = pool.submit(_timed, self.answer, query, retrieved_clauses, None, _citation_contracts(citations))
+            proposal_future = pool.submit(_timed, propose_redline, retrieved_clauses, self.llm) if wants_proposal else None
+            
+            proposal = None
+            if proposal_future is not None:
+                try:
+                    proposal, timings["propose"] = proposal_future.result()
+                except Exception as e:
+                    proposal = f"Error generating safer clause: {e}"
+            answer, timings["synthesize"] = answer_future.result()
+        
+        timings["total"] = time.perf_counter() - started
+        
+        return {
+            "intent": intent,
+            "steps": steps,
+            "citations": citations,
+            "answer": answer,
+            "proposal": proposal,
+            "timings": timings
+        }
+
+    def run_stream(self, query: str, clauses: Sequence[str], top_k: int = 5,
+                   file_map: List[Tuple[str, int, int]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of ``run`` for progressive UIs. Yields events in order:
+        {"type": "intent", "intent", "steps"}, {"type": "citations", "citations"},
+        {"type": "answer_delta", "text"} (repeated), {"type": "proposal", "proposal"}
+        (when one is generated), and finally {"type": "done", "result"} carrying
+        the same dict ``run`` returns. The safer-clause proposal is generated in
+        the background while the answer streams.
+        """
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+        
+        intent = self.classify(query)
+        steps = self.plan(query)
+        timings["classify"] = time.perf_counter() - started
+        yield {"type": "intent", "intent": intent, "steps": steps}
+        
+        step_started = time.perf_counter()
+        retrieved_clauses, citations = self._retrieve(query, clauses, top_k, file_map)
+        timings["retrieve"] = time.perf_counter() - step_started
+        yield {"type": "citations", "citations": citations}
+        
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="agent-step", initializer=_attach_script_context, initargs=(_current_script_context(),)) as pool:
+            proposal_future = pool.submit(_timed, propose_redline, retrieved_clauses, self.llm) if self._wants_proposal(intent, query) else None
+            
+            step_started = time.perf_counter()
+            answer_parts = []
+            for delta in self.answer_stream(query, retrieved_clauses, None, _citation_contracts(citations)):
+                if delta:
+                    answer_parts.append(delta)
+                    yield {"type": "answer_delta", "text": delta}
+            timings["synthesize"] = time.perf_counter() - step_started
+            
+            proposal = None
+            if proposal_future is not None:
+                try:
+                    proposal, timings["propose"] = proposal_future.result()
+                except Exception as e:
+                    proposal = f"Error generating safer clause: {e}"
+                yield {"type": "proposal", "proposal": proposal}
+        
+        timings["total"] = time.perf_counter() - started
+        yield {"type": "done", "result": {
+            "intent": intent,
+            "steps": steps,
+            "citations": citations,
+            "answer": "".join(answer_parts),
+            "proposal": proposal,
+            "timings": timings
+        }}
+
+    def _retrieve(self, query: str, clauses: Sequence[str], top_k: int,
+                  file_map: List[Tuple[str, int, int]] = None) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Top-k clauses for the query (BM25, keyword fallback) and their citations."""
         try:
-            idx, toks = build_bm25_index(clauses)
-            ranked = retrieve(query, clauses, idx, toks, k=top_k)
-            retrieved_clauses = [clauses[i] for i, _ in ranked] if ranked else []
-            citations = []
-            for i, score in ranked:
-                snippet = clauses[i][:400] + ("..." if len(clauses[i]) > 400 else "")
-                citations.append({
-                    "index": i,
-                    "score": float(score),
-                    "text": snippet
-                })
+            # Memory-mapped corpora carry a prebuilt index; edited documents update theirs in place;
+            # everything else goes through the cache
+            idx = getattr(clauses, "bm25", None)
+            if idx is None and self.incremental_index is not None:
+                idx = self.incremental_index
+                idx.update(clauses)
+            elif idx is None:
+                idx = self.index_cache.get_or_build(clauses, build_bm25_index, namespace=BM25_CACHE_NAMESPACE)
+            ranked = retrieve(query, clauses, idx, k=top_k)
         except Exception as e:
             # Fallback to simple keyword matching
             ranked = self._keyword_fallback(query, clauses, top_k)
-            retrieved_clauses = [clauses[i] for i, _ in ranked] if ranked else []
-            citations = []
-            for i, score in ranked:
-                snippet = clauses[i][:400] + ("..." if len(clauses[i]) > 400 else "")
-                citations.append({
-                    "index": i,
-                    "score": score,
-                    "text": snippet
-                })
-        
-        # Step 3: Generate grounded answer
-        answer = self.answer(query, retrieved_clauses, file_map)
+        retrieved_clauses = [clauses[i] for i, _ in ranked] if ranked else []
+        return retrieved_clauses, self._citations(clauses, ranked, contract_locator(clauses, file_map))
+
+    @staticmethod
+    def _citations(clauses: Sequence[str], ranked: List[Tuple[int, float]],
+                   locate: Optional[Callable[[int], Optional[str]]] = None) -> List[Dict[str, Any]]:
+        """Citation dicts (index, score, snippet and, when known, contract) for ranked clauses."""
+        citations = []
+        for i, score in ranked:
+            # ClauseStore slices only the snippet out of its buffer
+            snippet, truncated = clause_snippet(clauses, i, 400)
+            snippet += "..." if truncated else ""
+            citation = {
+                "index": i,
+                "score": float(score),
+                "text": snippet
+            }
+            if locate is not None:
+                citation["contract"] = locate(i)
+            citations.append(citation)
+        return citations
+
+    # --- Cross-contract (portfolio) questions ---
+    def run_portfolio(self, query: str, portfolio: PortfolioIndex, top_contracts: int = 10,
+                      clauses_per_contract: int = 2, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Answer a question across a whole portfolio, e.g. "which of our contracts
+        have uncapped indemnity?". Contracts are ranked by their best clause
+        (optionally filtered by contract metadata) and the answer is grounded in
+        each matching contract's top clauses. Returns the ``run`` dict plus
+        ``contracts``: one entry per matching contract with its citations.
+        """
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+        intent = self.classify(query)
+        steps = self.plan(query)
         
-        # Step 4: Optionally propose safer clause
-        proposal = None
-        if intent == "redline" or any(k in query.lower() for k in ["liability", "indemn", "renewal", "notice", "risk"]):
-            try:
-                proposal = propose_redline(retrieved_clauses, self.llm)
-            except Exception as e:
-                proposal = f"Error generating safer clause: {e}"
+        hits = portfolio.search(query, top_contracts, clauses_per_contract, filters)
+        ranked = [clause for hit in hits for clause in hit.clauses]
+        retrieved_clauses = [portfolio.clauses[i] for i, _ in ranked]
+        citations = self._citations(portfolio.clauses, ranked, portfolio.contract_of)
+        contracts = [
+            {
+                "contract": hit.contract,
+                "score": hit.score,
+                "metadata": hit.metadata,
+                "citations": [c for c in citations if c["contract"] == hit.contract]
+            }
+            for hit in hits
+        ]
+        timings["retrieve"] = time.perf_counter() - started
         
+        answer, timings["synthesize"] = _timed(self.answer, query, retrieved_clauses, None, _citation_contracts(citations))
+        timings["total"] = time.perf_counter() - started
         return {
             "intent": intent,
             "steps": steps,
             "citations": citations,
+            "contracts": contracts,
             "answer": answer,
-            "proposal": proposal
+            "proposal": None,
+            "timings": timings
         }
 
-    def _keyword_fallback(self, query: str, clauses: List[str], top_k: int) -> List[Tuple[int, float]]:
+    @staticmethod
+    def _wants_proposal(intent: str, query: str) -> bool:
+        """Redline intents and risk-related questions get a safer-clause proposal."""
+        return intent == "redline" or any(k in query.lower() for k in ["liability", "indemn", "renewal", "notice", "risk"])
+
+    def _keyword_fallback(self, query: str, clauses: Sequence[str], top_k: int) -> List[Tuple[int, float]]:
         """Simple keyword fallback when BM25 is not available."""
-        query_words = set(query.lower().split())
-        scored_clauses = []
-        
-        for i, clause in enumerate(clauses):
-            clause_words = set(clause.lower().split())
-            score = len(query_words.intersection(clause_words))
-            if score > 0:
-                scored_clauses.append((i, float(score)))
-        
-        # Sort by score and return top_k with indices
-        scored_clauses.sort(key=lambda x: x[1], reverse=True)
-        return scored_clauses[:top_k]
+        if not clauses:
+            return []
+        index = self.index_cache.get_or_build(clauses, InvertedIndex, namespace="keyword")
+        return index.search(query, top_k)
 
     # --- internal ---
     def _call_llm(self, prompt: str) -> str:
@@ -151,45 +308,69 @@ class Agent:
             raise Exception(f"LLM error: {e}")
 
 
+
+def _citation_contracts(citations: List[Dict[str, Any]]) -> Optional[List[Optional[str]]]:
+    """Contract name per citation, or None when citations carry no contract."""
+    if not any(c.get("contract") for c in citations):
+        return None
+    return [c.get("contract") for c in citations]
+
+
+def _timed(fn: Callable[..., Any], *args) -> Tuple[Any, float]:
+    """Run ``fn`` and return its result with the elapsed wall-clock seconds."""
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
 try:
-    from rank_bm25 import BM25Okapi
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 except Exception:
-    BM25Okapi = None
+    add_script_run_ctx = get_script_run_ctx = None
+
 
+def _current_script_context():
+    """Streamlit script context of the calling thread, if any."""
+    return get_script_run_ctx() if get_script_run_ctx else None
 
 
-_split = re.compile(r"\n{2,}|\n\s*(SECTION\s+\d+\.|ARTICLE\s+\d+\.|\d+\.\d+\.|\d+\.)\s+", re.IGNORECASE)
+def _attach_script_context(ctx) -> None:
+    """Let worker threads issue st.* calls (e.g. provider warnings) for the session."""
+    if ctx is not None and add_script_run_ctx:
+        add_script_run_ctx(ctx=ctx)
+
 
 def split_into_clauses(text: str) -> List[str]:
+    """Clause texts of ``text`` (see ``segmenter.segment_clauses`` for offsets and sections)."""
     if not text:
         return []
-    t = text.replace("\r", "")
-    parts = _split.split(t)
-    if len(parts) <= 1:
-        parts = re.split(r"\n{2,}", t)
-    return [p.strip() for p in parts if p and p.strip()]
+    return list(iter_clauses([text]))
+
+
+def iter_clauses(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Streaming counterpart of ``split_into_clauses``: consume text chunks (pages,
+    paragraphs, file reads) and yield clauses as soon as they are complete.
+    Only the unfinished tail after the last clause boundary is buffered.
+    """
+    for _, text in iter_segments(chunks):
+        yield text
 
 
-def build_bm25_index(clauses: List[str]):
+def build_bm25_index(clauses: Sequence[str]) -> Optional[BM25Index]:
     if not clauses:
-        return None, []
-    if BM25Okapi is None:
-        raise Exception("BM25 retrieval not available. Please install rank_bm25: pip install rank_bm25")
-    tokenized = [c.lower().split() for c in clauses]
-    return BM25Okapi(tokenized), tokenized
+        return None
+    return BM25Index([tokenize(c) for c in clauses])
 
 
-def retrieve(query: str, clauses: List[str], index_obj, tokenized, k: int = 5) -> List[Tuple[int, float]]:
+def retrieve(query: str, clauses: Sequence[str], index_obj, k: int = 5) -> List[Tuple[int, float]]:
     if not clauses:
         return []
-    q = query.lower().split()
-    if BM25Okapi is not None and index_obj is not None:
-        scores = index_obj.get_scores(q)
-        ranked = sorted(list(enumerate(scores)), key=lambda x: x[1], reverse=True)
-        return ranked[:k]
+    q = tokenize(query)
+    if index_obj is not None:
+        return index_obj.top_k(q, k)
     else:
-        # Require BM25 for proper retrieval
-        raise Exception("BM25 retrieval not available. Please install rank_bm25: pip install rank_bm25")
+        raise Exception("BM25 index not built for these clauses.")
 
 
 def propose_redline(clauses: List[str], llm_client) -> str:
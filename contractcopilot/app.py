@@ -1,13 +1,18 @@
 import streamlit as st
-import os
 import time
 
 # Import from local utils
 from utils.config import load_config
-from utils.llm_client import LLMClient
+from utils.llm_client import get_shared_llm_client
 from components.clause_input import clause_input
 
 from agents import Agent, split_into_clauses
+from ingestion import read_document
+from library import get_contract_library, sample_contracts_zip, warm_contract_library
+from retrieval import IncrementalBM25Index
+
+# Load, split and index the contract library as soon as the app module loads
+warm_contract_library()
 
 # Page configuration
 st.set_page_config(
@@ -73,59 +78,14 @@ st.markdown("""
 # -----------------------------
 
 def _read_file(uploaded) -> str:
-    name = uploaded.name.lower()
-    if name.endswith(".txt"):
-        return uploaded.read().decode("utf-8", errors="ignore")
-    if name.endswith(".md"):
-        return uploaded.read().decode("utf-8", errors="ignore")
-    if name.endswith(".docx"):
-        try:
-            from docx import Document
-            doc = Document(uploaded)
-            return "\n".join(p.text for p in doc.paragraphs)
-        except Exception:
-            return ""
-    if name.endswith(".pdf"):
-        try:
-            import PyPDF2
-            reader = PyPDF2.PdfReader(uploaded)
-            text = ""
-            for p in reader.pages:
-                text += p.extract_text() or ""
-            return text
-        except Exception:
-            return ""
-    return uploaded.read().decode("utf-8", errors="ignore")
+    return read_document(uploaded)
 
 def load_compliance_contracts():
     """Load compliance contract files with user-friendly names"""
-    assets_dir = os.path.join(os.path.dirname(__file__), 'assets')
-    compliance_files = {
-        # GDPR Contracts
-        "🛡️ GDPR Data Processing Agreement": "gdpr_data_processing_agreement.md",
-        "🛡️ GDPR SaaS Subscription Agreement": "gdpr_saas_subscription_agreement.md",
-        
-        # CCPA Contracts
-        "🔒 CCPA Data Sharing Addendum": "ccpa_data_sharing_addendum.md",
-        "🔒 CCPA Marketing Services Agreement": "ccpa_marketing_services_agreement.md",
-        
-        # HIPAA Contracts
-        "🏥 HIPAA Business Associate Agreement": "hipaa_business_associate_agreement.md",
-        "🏥 HIPAA Telehealth Services Agreement": "hipaa_telehealth_services_agreement.md"
-    }
-    
-    loaded_contracts = {}
-    for display_name, filename in compliance_files.items():
-        file_path = os.path.join(assets_dir, filename)
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    content = file.read()
-                loaded_contracts[display_name] = content
-            except Exception as e:
-                st.warning(f"Could not load {display_name}: {e}")
-    
-    return loaded_contracts
+    library = get_contract_library()
+    for display_name, error in library.load_errors.items():
+        st.warning(f"Could not load {display_name}: {error}")
+    return library
 
 
 def main():
@@ -133,9 +93,8 @@ def main():
     if 'config' not in st.session_state:
         st.session_state.config = load_config()
     
-    # Initialize LLM client
     if 'llm_client' not in st.session_state:
-        st.session_state.llm_client = LLMClient()
+        st.session_state.llm_client = get_shared_llm_client(st.session_state.get('config'))
     
     # Test agent functionality
     if 'agent_tested' not in st.session_state:
@@ -220,7 +179,7 @@ def main():
         # Input method selection
         input_method = st.radio(
             "Choose input method:",
-            ["📄 Select from Compliance Contracts", "📝 Paste Custom Text"],
+            ["📄 Select from Compliance Contracts", "🗂️ Search All Contracts", "📝 Paste Custom Text"],
             horizontal=True
         )
         
@@ -229,32 +188,64 @@ def main():
         file_map = []
         
         if input_method == "📄 Select from Compliance Contracts":
-            if compliance_contracts:
+            if compliance_contracts.names():
                 # Single dropdown with all contracts
                 selected_contract = st.selectbox(
                     "Choose a compliance contract:",
-                    ["Select a contract..."] + list(compliance_contracts.keys()),
+                    ["Select a contract..."] + compliance_contracts.names(),
                     help="Select one of the pre-loaded GDPR, CCPA, or HIPAA compliance contracts"
                 )
                 
                 if selected_contract != "Select a contract...":
-                    text = compliance_contracts[selected_contract]
-                    contract_clauses = split_into_clauses(text)
+                    # Clauses and retrieval index were built once at warm-up
+                    contract = compliance_contracts.get(selected_contract)
+                    contract_clauses = contract.clauses
                     clauses = contract_clauses
                     file_map = [(selected_contract, 0, len(contract_clauses))]
                     analysis_type = "Compliance Contract"
                     
                     st.success(f"✅ Loaded: {selected_contract}")
+                    if contract.analyses:
+                        levels = [a.get('risk', {}).get('risk_level') for a in contract.analyses]
+                        st.caption(
+                            f"Precomputed review: {levels.count('high')} high, "
+                            f"{levels.count('medium')} medium, {levels.count('low')} low risk clauses"
+                        )
                 else:
                     st.info("👆 Please select a compliance contract to analyze")
             else:
                 st.error("❌ No compliance contracts found. Please ensure the contract files are in the assets directory.")
         
+        elif input_method == "🗂️ Search All Contracts":
+            portfolio = compliance_contracts.portfolio()
+            st.caption(f"Searching {len(portfolio)} contracts ({len(portfolio.clauses)} clauses)")
+            portfolio_question = st.text_input(
+                "Ask a question across all contracts:",
+                placeholder="Which of our contracts have uncapped indemnity?"
+            )
+            framework_filter = st.multiselect("Limit to frameworks (optional):", ["GDPR", "CCPA", "HIPAA"])
+            if portfolio_question and st.button("🔎 Search Portfolio", type="primary", use_container_width=True):
+                try:
+                    agent = Agent(st.session_state.llm_client)
+                    filters = {"framework": framework_filter} if framework_filter else None
+                    with st.spinner("Searching across contracts..."):
+                        result = agent.run_portfolio(portfolio_question, portfolio, filters=filters)
+                    st.markdown("**🤖 AI Answer:**")
+                    st.write(result['answer'])
+                    if not result['contracts']:
+                        st.info("No contracts matched this question.")
+                    for hit in result['contracts']:
+                        with st.expander(f"{hit['contract']} (score {hit['score']:.2f})", expanded=False):
+                            for citation in hit['citations']:
+                                st.markdown(f"- {citation['text']}")
+                except Exception as e:
+                    st.error(f"Error in portfolio search: {e}")
+        
         else:  # Paste Custom Text
             clause_input()
             clause_text = st.session_state.get('clause_text', '')
             if clause_text:
-                clauses = [clause_text]
+                clauses = split_into_clauses(clause_text) or [clause_text]
                 analysis_type = "Custom Text"
                 
                 # Policy lens selection for custom text
@@ -306,14 +297,21 @@ def main():
                 
                 # Run agentic analysis
                 try:
-                    with st.spinner("Running agentic analysis..."):
+                    if analysis_type == "Custom Text":
+                        # Pasted text is edited between runs; re-index only the clauses that changed
+                        if 'custom_text_index' not in st.session_state:
+                            st.session_state.custom_text_index = IncrementalBM25Index()
+                        agent = Agent(st.session_state.llm_client, incremental_index=st.session_state.custom_text_index)
+                    else:
                         agent = Agent(st.session_state.llm_client)
-                        # Pass file_map for contract analysis
-                        file_map_to_pass = file_map if analysis_type == "Compliance Contract" else None
-                        result = agent.run(question, clauses, top_k=5, file_map=file_map_to_pass)
+                    # Pass file_map for contract analysis
+                    file_map_to_pass = file_map if analysis_type == "Compliance Contract" else None
+                    # Stream the pipeline: intent and citations first, then answer tokens as they arrive
+                    events = agent.run_stream(question, clauses, top_k=5, file_map=file_map_to_pass)
+                    plan_event = next(events)
                     
                     # Dynamic CTA label based on intent
-                    intent = result['intent']
+                    intent = plan_event['intent']
                     if intent == 'qa':
                         cta_label = "🚀 Run Agentic Analysis"
                     elif intent == 'extract':
@@ -324,11 +322,20 @@ def main():
                         cta_label = "🚀 Run Agentic Analysis"
                     
                     # Show detected intent
-                    st.caption(f"Intent: {intent.upper()} → Steps: {' → '.join(result['steps'])}")
+                    st.caption(f"Intent: {intent.upper()} → Steps: {' → '.join(plan_event['steps'])}")
                     
-                    # Display AI analysis
+                    # Display AI analysis as it streams
                     st.markdown("**🤖 AI Answer:**")
-                    st.write(result['answer'])
+                    result = {}
+                    
+                    def answer_deltas():
+                        for event in events:
+                            if event['type'] == 'answer_delta':
+                                yield event['text']
+                            elif event['type'] == 'done':
+                                result.update(event['result'])
+                    
+                    st.write_stream(answer_deltas())
                     
                     # Display safer clause only if relevant
                     if result['proposal'] and (result['intent'] == 'redline' or any(word in question.lower() for word in ['risk', 'safer', 'improve', 'better', 'liability', 'indemn'])):
@@ -357,7 +364,8 @@ def main():
                                 if 'revisions_buffer' not in st.session_state:
                                     st.session_state.revisions_buffer = []
                                 st.session_state.revisions_buffer.append({
-                                    'original': clauses[0] if len(clauses) == 1 else "Multiple clauses",
+                                    'original': clause_text if analysis_type == "Custom Text" else (
+                                        clauses[0] if len(clauses) == 1 else "Multiple clauses"),
                                     'safer_clause': result['proposal'],
                                     'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")
                                 })
@@ -407,36 +415,10 @@ Generated: {time.strftime("%Y-%m-%d %H:%M:%S")}
         st.markdown("### 📄 Sample Data")
         st.markdown("Download all sample contracts as a single zip file:")
         
-        # Create zip file with all contracts
-        import zipfile
-        import io
-        
-        def create_contracts_zip():
-            zip_buffer = io.BytesIO()
-            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                assets_dir = os.path.join(os.path.dirname(__file__), 'assets')
-                
-                # Add compliance contracts
-                compliance_files = {
-                    "GDPR_Data_Processing_Agreement.md": "gdpr_data_processing_agreement.md",
-                    "GDPR_SaaS_Subscription_Agreement.md": "gdpr_saas_subscription_agreement.md",
-                    "CCPA_Data_Sharing_Addendum.md": "ccpa_data_sharing_addendum.md",
-                    "CCPA_Marketing_Services_Agreement.md": "ccpa_marketing_services_agreement.md",
-                    "HIPAA_Business_Associate_Agreement.md": "hipaa_business_associate_agreement.md",
-                    "HIPAA_Telehealth_Services_Agreement.md": "hipaa_telehealth_services_agreement.md"
-                }
-                
-                for display_name, filename in compliance_files.items():
-                    file_path = os.path.join(assets_dir, filename)
-                    if os.path.exists(file_path):
-                        zip_file.write(file_path, display_name)
-            
-            zip_buffer.seek(0)
-            return zip_buffer.getvalue()
-        
         # Download button for zip file
         try:
-            zip_data = create_contracts_zip()
+            # Built once per asset fingerprint, not on every rerun
+            zip_data = sample_contracts_zip()
             st.download_button(
                 label="📦 Download All Contracts (ZIP)",
                 data=zip_data,
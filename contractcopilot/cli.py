@@ -0,0 +1,195 @@
+"""
+Headless batch runner for portfolio-scale contract analysis.
+
+Example:
+    python cli.py contracts/ --output results.jsonl --concurrency 8
+    python cli.py --manifest manifest.txt --output results.jsonl --analyses agent,risk,compliance
+
+The output JSONL doubles as the checkpoint: re-running with the same
+``--output`` skips contracts that already have a successful record.
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Set
+
+from agents import Agent
+from ingestion import iter_document_clauses, read_pdf_clauses
+from utils.config import COMPLIANCE_FRAMEWORKS, load_config
+from utils.llm_client import LLMClient
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt", ".md")
+ANALYSES = ("agent", "risk", "metadata", "compliance")
+DEFAULT_QUESTION = (
+    "Analyze this contract data for risk level, compliance with regulatory frameworks, "
+    "and suggest specific improvements to make it safer and more protective."
+)
+
+
+def discover_contracts(inputs: List[str], manifest: str = None) -> Iterator[str]:
+    """Yield contract paths from directories/files on the command line and an optional manifest."""
+    paths = list(inputs)
+    if manifest:
+        with open(manifest, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                # Manifest lines are plain paths or JSON objects with a "path" key
+                paths.append(json.loads(line)["path"] if line.startswith("{") else line)
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for filename in sorted(files):
+                    if filename.lower().endswith(SUPPORTED_EXTENSIONS):
+                        yield os.path.join(root, filename)
+        elif os.path.isfile(path):
+            yield path
+
+
+def contract_id(path: str) -> str:
+    """Stable id for checkpointing: the normalized absolute path."""
+    return os.path.normcase(os.path.abspath(path))
+
+
+def load_completed(output_path: str) -> Set[str]:
+    """Contract ids that already have a successful record in the output file."""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # partially written line from an interrupted run
+            if record.get("status") == "ok":
+                completed.add(record["contract_id"])
+    return completed
+
+
+def analyze_contract(path: str, llm_client: LLMClient, analyses: List[str], question: str,
+                     top_k: int, llm_concurrency: int, clauses_per_prompt: int,
+                     pdf_workers: int = 1) -> Dict[str, Any]:
+    """Run the selected analyses over one contract and return its result record."""
+    started = time.perf_counter()
+    name = os.path.basename(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    clause_pages = None
+    if name.lower().endswith(".pdf"):
+        # Page offsets survive extraction so citations can point at a page
+        clauses, clause_pages = read_pdf_clauses(io.BytesIO(data), parallel=pdf_workers > 1, max_workers=pdf_workers)
+    else:
+        clauses = list(iter_document_clauses(io.BytesIO(data), name))
+    record: Dict[str, Any] = {
+        "contract_id": contract_id(path),
+        "path": path,
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "clause_count": len(clauses),
+    }
+    if clause_pages is not None:
+        record["clause_pages"] = clause_pages
+    
+    retrieved = clauses[:top_k]
+    if "agent" in analyses and clauses:
+        result = Agent(llm_client).run(question, clauses, top_k=top_k, file_map=[(name, 0, len(clauses))])
+        if clause_pages is not None:
+            for citation in result["citations"]:
+                citation["page"] = clause_pages[citation["index"]]
+        record["agent"] = result
+        retrieved = [clauses[c["index"]] for c in result["citations"]] or retrieved
+    if "risk" in analyses:
+        record["risk"] = llm_client.analyze_clause_risk_batch(
+            clauses, max_concurrency=llm_concurrency, clauses_per_prompt=clauses_per_prompt
+        )
+    # Metadata and compliance look at the most relevant clauses, not every clause
+    context = "\n\n".join(retrieved)
+    sections = [name for name in ("metadata", "compliance") if name in analyses]
+    if sections and context:
+        # One fused call instead of resending the same context per analysis
+        record.update(llm_client.analyze_clause_full(context, COMPLIANCE_FRAMEWORKS, sections=sections))
+    
+    record["status"] = "ok"
+    record["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def run_batch(args: argparse.Namespace) -> int:
+    analyses = [a.strip() for a in args.analyses.split(",") if a.strip()]
+    unknown = [a for a in analyses if a not in ANALYSES]
+    if unknown:
+        raise SystemExit(f"Unknown analyses: {', '.join(unknown)} (choose from {', '.join(ANALYSES)})")
+    
+    completed = load_completed(args.output)
+    pending = []
+    seen = set(completed)
+    for path in discover_contracts(args.inputs, args.manifest):
+        if contract_id(path) not in seen:
+            seen.add(contract_id(path))
+            pending.append(path)
+    print(f"{len(completed)} contracts already done, {len(pending)} to analyze", file=sys.stderr)
+    if not pending:
+        return 0
+    
+    llm_client = LLMClient(config=load_config())
+    # Contracts already run in parallel; each one's PDF pool gets its share of the cores
+    pdf_workers = max(1, (os.cpu_count() or 1) // max(1, args.concurrency)) if args.parallel_pdf else 1
+    write_lock = threading.Lock()
+    failures = 0
+    
+    with open(args.output, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        futures = {
+            pool.submit(analyze_contract, path, llm_client, analyses, args.question, args.top_k,
+                        args.llm_concurrency, args.clauses_per_prompt, pdf_workers): path
+            for path in pending
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                failures += 1
+                record = {"contract_id": contract_id(path), "path": path, "status": "error", "error": str(e)}
+            # One line per contract, flushed immediately so an interrupted run can resume
+            with write_lock:
+                out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                out.flush()
+            print(f"[{done}/{len(pending)}] {record['status']}: {path}", file=sys.stderr)
+    
+    return 1 if failures else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Analyze a folder or manifest of contracts headlessly.")
+    parser.add_argument("inputs", nargs="*", help="Contract files or directories (.pdf, .docx, .txt, .md)")
+    parser.add_argument("--manifest", help="File listing contract paths (one per line, or JSON lines with a 'path')")
+    parser.add_argument("--output", required=True, help="JSONL results file; also used as the resume checkpoint")
+    parser.add_argument("--analyses", default="agent,risk", help=f"Comma-separated subset of: {', '.join(ANALYSES)}")
+    parser.add_argument("--question", default=DEFAULT_QUESTION, help="Question for the agentic pipeline")
+    parser.add_argument("--top-k", type=int, default=5, help="Clauses retrieved per contract")
+    parser.add_argument("--concurrency", type=int, default=4, help="Contracts analyzed in parallel")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="Concurrent LLM calls per contract for risk analysis")
+    parser.add_argument("--clauses-per-prompt", type=int, default=5, help="Clauses packed into one risk-analysis prompt")
+    parser.add_argument("--parallel-pdf", action="store_true",
+                        help="Extract pages of large PDFs on process pools (cores split across --concurrency)")
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if not args.inputs and not args.manifest:
+        build_parser().error("provide contract paths/directories or --manifest")
+    return run_batch(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,15 +3,15 @@ import sys
 import os
 
 # Import from utils
-from utils.llm_client import LLMClient
+from utils.config import COMPLIANCE_FRAMEWORKS
+from utils.llm_client import get_shared_llm_client
 
 def compliance_checker():
     """Compliance checking component using LLM analysis."""
     st.subheader("⚖️ Compliance Analysis")
     
-    # Initialize LLM client
     if 'llm_client' not in st.session_state:
-        st.session_state.llm_client = LLMClient()
+        st.session_state.llm_client = get_shared_llm_client(st.session_state.get('config'))
     
     llm_client = st.session_state.llm_client
     
@@ -23,13 +23,7 @@ def compliance_checker():
         return
     
     # Compliance frameworks to check
-    frameworks = {
-        "GDPR": "General Data Protection Regulation",
-        "CCPA": "California Consumer Privacy Act", 
-        "SOX": "Sarbanes-Oxley Act",
-        "HIPAA": "Health Insurance Portability and Accountability Act",
-        "PCI-DSS": "Payment Card Industry Data Security Standard"
-    }
+    frameworks = COMPLIANCE_FRAMEWORKS
     
     # Check compliance button
     if st.button("🔍 Check Compliance", type="secondary"):
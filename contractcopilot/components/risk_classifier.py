@@ -3,15 +3,14 @@ import sys
 import os
 
 # Import from utils
-from utils.llm_client import LLMClient
+from utils.llm_client import get_shared_llm_client
 
 def risk_classifier():
     """Risk classification component using LLM analysis."""
     st.subheader("🔍 Risk Analysis")
     
-    # Initialize LLM client
     if 'llm_client' not in st.session_state:
-        st.session_state.llm_client = LLMClient()
+        st.session_state.llm_client = get_shared_llm_client(st.session_state.get('config'))
     
     llm_client = st.session_state.llm_client
     
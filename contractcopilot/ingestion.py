@@ -0,0 +1,201 @@
+from __future__ import annotations
+import bisect
+import codecs
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
+
+from agents import iter_clauses
+from segmenter import iter_segments
+
+# Size of each read when streaming plain-text uploads
+READ_CHUNK_BYTES = 64 * 1024
+# PDFs shorter than this are extracted in-process; pool start-up would dominate
+PARALLEL_MIN_PAGES = 32
+PAGES_PER_TASK = 8
+
+
+@dataclass
+class PageText:
+    """Extracted text of one PDF page and where it sits in the document text."""
+    page_number: int  # 1-based
+    start: int        # offset of the page's first character in the joined text
+    text: str
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.text)
+
+
+def iter_pages(source: BinaryIO, name: Optional[str] = None, parallel: bool = False) -> Iterator[str]:
+    """
+    Yield a document's text in reading order, one unit at a time:
+    PDF pages, DOCX paragraphs, or fixed-size chunks of TXT/MD files.
+    Nothing beyond the current unit is held in memory.
+    With ``parallel``, PDF pages are extracted on a process pool.
+    """
+    name = (name or getattr(source, "name", "") or "").lower()
+    if name.endswith(".pdf"):
+        if parallel:
+            yield from (page.text for page in iter_pdf_pages_parallel(source))
+        else:
+            yield from _iter_pdf_pages(source)
+    elif name.endswith(".docx"):
+        yield from _iter_docx_paragraphs(source)
+    else:
+        yield from _iter_text_chunks(source)
+
+
+def iter_document_clauses(source: BinaryIO, name: Optional[str] = None, parallel: bool = False) -> Iterator[str]:
+    """
+    Stream clauses out of an uploaded document while later pages are still being
+    extracted, so splitting, indexing and analysis can start immediately.
+    """
+    return iter_clauses(iter_pages(source, name, parallel=parallel))
+
+
+def read_document(source: BinaryIO, name: Optional[str] = None, parallel: bool = False) -> str:
+    """Full document text (joined once, not concatenated page by page)."""
+    return "".join(iter_pages(source, name, parallel=parallel))
+
+
+def iter_pdf_pages_parallel(source: BinaryIO, max_workers: Optional[int] = None,
+                            pages_per_task: int = PAGES_PER_TASK) -> Iterator[PageText]:
+    """
+    Extract PDF pages on a process pool and yield them in page order with their
+    character offsets. Page ranges fan out across cores; results are reassembled
+    in order as soon as each range (and all ranges before it) is done.
+    """
+    data = source.read() if hasattr(source, "read") else bytes(source)
+    try:
+        import PyPDF2
+        page_count = len(PyPDF2.PdfReader(io.BytesIO(data)).pages)
+    except Exception:
+        return
+    
+    workers = max_workers or os.cpu_count() or 1
+    if page_count < PARALLEL_MIN_PAGES or workers < 2:
+        batches = iter([_extract_page_range(data, 0, page_count)])
+        pool = None
+    else:
+        ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+        # The PDF bytes go to each worker once (initializer), not once per task
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=_pool_context(),
+                                   initializer=_init_pdf_worker, initargs=(data,))
+        batches = pool.map(_extract_worker_range, ranges)
+    
+    offset = 0
+    page_number = 1
+    try:
+        for texts in batches:
+            for text in texts:
+                yield PageText(page_number=page_number, start=offset, text=text)
+                offset += len(text)
+                page_number += 1
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def read_pdf_pages(source: BinaryIO, max_workers: Optional[int] = None) -> List[PageText]:
+    """All pages of a PDF with page-offset metadata for citations."""
+    return list(iter_pdf_pages_parallel(source, max_workers=max_workers))
+
+
+def read_pdf_clauses(source: BinaryIO, parallel: bool = False,
+                     max_workers: Optional[int] = None) -> Tuple[List[str], List[Optional[int]]]:
+    """
+    Clauses of a PDF and the 1-based page each clause starts on, for page-level
+    citations. With ``parallel``, pages are extracted on a process pool of
+    ``max_workers`` processes (default: one per core).
+    """
+    pages = read_pdf_pages(source, max_workers=max_workers if parallel else 1)
+    segments = list(iter_segments(page.text for page in pages))
+    clauses = [text for _, text in segments]
+    return clauses, pages_for_offsets(pages, [span.start for span, _ in segments])
+
+
+def page_for_offset(pages: List[PageText], offset: int) -> Optional[int]:
+    """1-based page number containing character ``offset`` of the joined text."""
+    return pages_for_offsets(pages, [offset])[0]
+
+
+def pages_for_offsets(pages: List[PageText], offsets: Iterable[int]) -> List[Optional[int]]:
+    """``page_for_offset`` for many offsets (e.g. clause starts), sharing one list of page starts."""
+    starts = [page.start for page in pages]
+    numbers = []
+    for offset in offsets:
+        i = bisect.bisect_right(starts, offset) - 1
+        numbers.append(pages[i].page_number if i >= 0 else None)
+    return numbers
+
+
+def _pool_context():
+    # Forking a multi-threaded process (the Streamlit server, the batch CLI) can
+    # deadlock on locks held by other threads; start workers from a clean process
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _iter_pdf_pages(source: BinaryIO) -> Iterator[str]:
+    try:
+        import PyPDF2
+        reader = PyPDF2.PdfReader(source)
+        for page in reader.pages:
+            yield page.extract_text() or ""
+    except Exception:
+        return
+
+
+# --- process-pool workers (module level so they pickle) ---
+_worker_pdf_bytes: Optional[bytes] = None
+
+
+def _init_pdf_worker(data: bytes) -> None:
+    global _worker_pdf_bytes
+    _worker_pdf_bytes = data
+
+
+def _extract_worker_range(page_range: Tuple[int, int]) -> List[str]:
+    return _extract_page_range(_worker_pdf_bytes, *page_range)
+
+
+def _extract_page_range(data: bytes, start: int, end: int) -> List[str]:
+    import PyPDF2
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    texts = []
+    for i in range(start, end):
+        try:
+            texts.append(reader.pages[i].extract_text() or "")
+        except Exception:
+            texts.append("")
+    return texts
+
+
+def _iter_docx_paragraphs(source: BinaryIO) -> Iterator[str]:
+    try:
+        from docx import Document
+        doc = Document(source)
+    except Exception:
+        return
+    for i, paragraph in enumerate(doc.paragraphs):
+        yield ("\n" if i else "") + paragraph.text
+
+
+def _iter_text_chunks(source: BinaryIO) -> Iterator[str]:
+    # Incremental decoding so multi-byte characters split across reads survive
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    while True:
+        data = source.read(READ_CHUNK_BYTES)
+        if not data:
+            break
+        if isinstance(data, str):
+            yield data
+            continue
+        yield decoder.decode(data)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
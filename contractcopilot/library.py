@@ -0,0 +1,326 @@
+"""
+Contract library: bundled compliance contracts (and an optional directory of
+standard templates) loaded, split and indexed once per process.
+
+Precomputed clause-level analyses can be stored in a JSON artifact so that
+selecting a library contract never waits on the LLM:
+
+    python library.py --precompute --artifact library_analyses.json [--templates DIR]
+
+Set CONTRACTCOPILOT_TEMPLATE_DIR to add templates and
+CONTRACTCOPILOT_LIBRARY_ARTIFACT to load precomputed analyses in the app.
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import zipfile
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents import BM25_CACHE_NAMESPACE, build_bm25_index, split_into_clauses
+from ingestion import read_document
+from retrieval import IndexCache, PortfolioIndex, get_index_cache
+from segmenter import build_clause_store
+from utils.config import COMPLIANCE_FRAMEWORKS
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+
+# Display name -> file in assets/
+BUNDLED_CONTRACTS = {
+    # GDPR Contracts
+    "🛡️ GDPR Data Processing Agreement": "gdpr_data_processing_agreement.md",
+    "🛡️ GDPR SaaS Subscription Agreement": "gdpr_saas_subscription_agreement.md",
+
+    # CCPA Contracts
+    "🔒 CCPA Data Sharing Addendum": "ccpa_data_sharing_addendum.md",
+    "🔒 CCPA Marketing Services Agreement": "ccpa_marketing_services_agreement.md",
+
+    # HIPAA Contracts
+    "🏥 HIPAA Business Associate Agreement": "hipaa_business_associate_agreement.md",
+    "🏥 HIPAA Telehealth Services Agreement": "hipaa_telehealth_services_agreement.md"
+}
+
+# Archive name -> file in assets/, for the sample-contracts download
+BUNDLED_ARCHIVE_NAMES = {
+    "GDPR_Data_Processing_Agreement.md": "gdpr_data_processing_agreement.md",
+    "GDPR_SaaS_Subscription_Agreement.md": "gdpr_saas_subscription_agreement.md",
+    "CCPA_Data_Sharing_Addendum.md": "ccpa_data_sharing_addendum.md",
+    "CCPA_Marketing_Services_Agreement.md": "ccpa_marketing_services_agreement.md",
+    "HIPAA_Business_Associate_Agreement.md": "hipaa_business_associate_agreement.md",
+    "HIPAA_Telehealth_Services_Agreement.md": "hipaa_telehealth_services_agreement.md"
+}
+
+TEMPLATE_EXTENSIONS = ('.md', '.txt', '.pdf', '.docx')
+ARTIFACT_VERSION = 1
+# Frameworks the bundled contracts cover
+DEFAULT_FRAMEWORKS = {code: COMPLIANCE_FRAMEWORKS[code] for code in ("GDPR", "CCPA", "HIPAA")}
+
+
+@dataclass
+class LibraryContract:
+    """One library contract, already split into clauses."""
+    name: str
+    path: str
+    text: str
+    clauses: List[str]
+    fingerprint: str  # sha256 of the text; keys precomputed analyses
+    mtime: float
+    analyses: List[Dict[str, Any]] = field(default_factory=list)  # per clause, when precomputed
+
+
+class ContractLibrary:
+    """
+    Named contracts loaded from disk once and kept in memory with their clauses.
+    Files are re-read only when their mtime changes (see ``refresh``).
+    """
+
+    def __init__(self, sources: Dict[str, str], index_cache: Optional[IndexCache] = None):
+        self.sources = dict(sources)
+        self.index_cache = index_cache if index_cache is not None else get_index_cache()
+        self.contracts: Dict[str, LibraryContract] = {}
+        self.load_errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._portfolio: Optional[Tuple[Tuple[str, ...], PortfolioIndex]] = None
+
+    def load(self) -> "ContractLibrary":
+        """Load (or reload changed) contracts, split them and warm their retrieval indexes."""
+        with self._lock:
+            for name, path in self.sources.items():
+                try:
+                    mtime = os.path.getmtime(path)
+                except OSError as e:
+                    self.contracts.pop(name, None)
+                    self.load_errors[name] = str(e)
+                    continue
+                current = self.contracts.get(name)
+                if current is not None and current.mtime == mtime:
+                    continue
+                try:
+                    self.contracts[name] = self._load_contract(name, path, mtime)
+                    self.load_errors.pop(name, None)
+                except Exception as e:
+                    self.load_errors[name] = str(e)
+        return self
+
+    refresh = load
+
+    def _load_contract(self, name: str, path: str, mtime: float) -> LibraryContract:
+        if path.lower().endswith(('.md', '.txt')):
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        else:
+            with open(path, 'rb') as f:
+                text = read_document(f, os.path.basename(path))
+        clauses = split_into_clauses(text)
+        if clauses:
+            # Same cache namespace as Agent retrieval, so the first query is a cache hit
+            self.index_cache.get_or_build(clauses, build_bm25_index, namespace=BM25_CACHE_NAMESPACE)
+        fingerprint = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        return LibraryContract(name, path, text, clauses, fingerprint, mtime)
+
+    def names(self) -> List[str]:
+        return [name for name in self.sources if name in self.contracts]
+
+    def get(self, name: str) -> Optional[LibraryContract]:
+        return self.contracts.get(name)
+
+    def texts(self) -> Dict[str, str]:
+        """Display name -> full text, in source order."""
+        return {name: self.contracts[name].text for name in self.names()}
+
+    def portfolio(self) -> PortfolioIndex:
+        """
+        Cross-contract index over every loaded contract, rebuilt only when a
+        contract's text changes. Contracts carry ``framework`` and ``source``
+        metadata for filtering.
+        """
+        with self._lock:
+            contracts = [self.contracts[name] for name in self.sources if name in self.contracts]
+            key = tuple(c.fingerprint for c in contracts)
+            if self._portfolio is None or self._portfolio[0] != key:
+                metadata = {
+                    c.name: {
+                        "framework": [fw for fw in DEFAULT_FRAMEWORKS if fw in c.name],
+                        "source": "bundled" if c.path.startswith(ASSETS_DIR) else "template",
+                    }
+                    for c in contracts
+                }
+                store = build_clause_store((c.name, c.text) for c in contracts)
+                self._portfolio = (key, PortfolioIndex(store, metadata))
+            return self._portfolio[1]
+
+    # --- Precomputed analyses ---
+    def precompute(self, llm_client, frameworks: Optional[Dict[str, str]] = None,
+                   sections: Optional[List[str]] = None) -> None:
+        """Run the fused clause analysis over every clause that has no analysis yet."""
+        frameworks = frameworks or DEFAULT_FRAMEWORKS
+        for contract in self.contracts.values():
+            if len(contract.analyses) == len(contract.clauses):
+                continue
+            analyses = []
+            for clause in contract.clauses:
+                try:
+                    analyses.append(llm_client.analyze_clause_full(clause, frameworks, sections=sections))
+                except Exception as e:
+                    analyses.append({"error": str(e)})
+            contract.analyses = analyses
+
+    def save_artifact(self, path: str) -> None:
+        """Write precomputed analyses, keyed by contract fingerprint, atomically."""
+        payload = {
+            "version": ARTIFACT_VERSION,
+            "contracts": {
+                c.fingerprint: {"name": c.name, "analyses": c.analyses}
+                for c in self.contracts.values() if c.analyses
+            },
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load_artifact(self, path: str) -> int:
+        """
+        Attach precomputed analyses from ``path``. Entries whose contract text has
+        changed since they were computed are ignored. Returns contracts matched.
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if payload.get("version") != ARTIFACT_VERSION:
+            return 0
+        entries = payload.get("contracts", {})
+        matched = 0
+        for contract in self.contracts.values():
+            entry = entries.get(contract.fingerprint)
+            if entry and len(entry.get("analyses", [])) == len(contract.clauses):
+                contract.analyses = entry["analyses"]
+                matched += 1
+        return matched
+
+
+def library_sources(template_dir: Optional[str] = None) -> Dict[str, str]:
+    """Bundled assets plus every supported file in ``template_dir`` (named by filename)."""
+    sources = {name: os.path.join(ASSETS_DIR, filename) for name, filename in BUNDLED_CONTRACTS.items()}
+    if template_dir and os.path.isdir(template_dir):
+        for filename in sorted(os.listdir(template_dir)):
+            if filename.lower().endswith(TEMPLATE_EXTENSIONS):
+                title = os.path.splitext(filename)[0].replace('_', ' ').replace('-', ' ').title()
+                sources[f"📑 {title}"] = os.path.join(template_dir, filename)
+    return sources
+
+
+def asset_fingerprint(paths: List[str]) -> Tuple:
+    """Cheap identity of a set of files: (path, mtime_ns, size) for each one that exists."""
+    fingerprint = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        fingerprint.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(fingerprint)
+
+
+def build_zip(files: Dict[str, str]) -> bytes:
+    """DEFLATE-compressed ZIP of ``files`` (archive name -> path); missing files are skipped."""
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for archive_name, path in files.items():
+            if os.path.exists(path):
+                zip_file.write(path, archive_name)
+    return zip_buffer.getvalue()
+
+
+_zip_cache: Dict[Tuple, bytes] = {}
+_zip_cache_lock = threading.Lock()
+
+
+def get_bundle_zip(files: Dict[str, str]) -> bytes:
+    """
+    ZIP of ``files``, built once per asset fingerprint and shared by every session.
+    Editing, adding or removing a file changes the fingerprint and rebuilds it.
+    """
+    key = (tuple(files), asset_fingerprint(list(files.values())))
+    with _zip_cache_lock:
+        data = _zip_cache.get(key)
+        if data is None:
+            # Only the current version of each bundle is worth keeping
+            for stale in [k for k in _zip_cache if k[0] == key[0]]:
+                del _zip_cache[stale]
+            data = build_zip(files)
+            _zip_cache[key] = data
+        return data
+
+
+def sample_contracts_zip() -> bytes:
+    """The bundled compliance contracts as a downloadable ZIP."""
+    return get_bundle_zip({name: os.path.join(ASSETS_DIR, filename) for name, filename in BUNDLED_ARCHIVE_NAMES.items()})
+
+
+_default_library: Optional[ContractLibrary] = None
+_default_library_lock = threading.Lock()
+_warmup_thread: Optional[threading.Thread] = None
+_warmup_lock = threading.Lock()
+
+
+def get_contract_library() -> ContractLibrary:
+    """
+    Process-wide contract library, built on first use (warm-up) and shared by all
+    sessions. Later calls only re-stat the files and reload ones that changed.
+    """
+    global _default_library
+    with _default_library_lock:
+        if _default_library is None:
+            library = ContractLibrary(library_sources(os.getenv("CONTRACTCOPILOT_TEMPLATE_DIR")))
+            library.load()
+            artifact = os.getenv("CONTRACTCOPILOT_LIBRARY_ARTIFACT")
+            if artifact:
+                library.load_artifact(artifact)
+            _default_library = library
+            return library
+    return _default_library.refresh()
+
+
+def warm_contract_library() -> None:
+    """
+    Start building the process-wide library on a background thread, once per
+    process. Callers of ``get_contract_library`` wait for it instead of building
+    their own, so the load overlaps with startup rather than the first request.
+    """
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=get_contract_library, name="library-warmup", daemon=True)
+            _warmup_thread.start()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load the contract library and optionally precompute clause analyses.")
+    parser.add_argument("--templates", help="Directory of standard templates to include")
+    parser.add_argument("--artifact", default="library_analyses.json", help="Precomputed analyses file")
+    parser.add_argument("--precompute", action="store_true", help="Analyze every clause with the LLM and save the artifact")
+    args = parser.parse_args(argv)
+
+    library = ContractLibrary(library_sources(args.templates)).load()
+    for name, error in library.load_errors.items():
+        print(f"Could not load {name}: {error}", file=sys.stderr)
+    reused = library.load_artifact(args.artifact)
+    print(f"Loaded {len(library.contracts)} contracts; {reused} already precomputed in {args.artifact}")
+    if args.precompute:
+        from utils.config import load_config
+        from utils.llm_client import LLMClient
+        library.precompute(LLMClient(config=load_config()))
+        library.save_artifact(args.artifact)
+        print(f"Wrote {args.artifact}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
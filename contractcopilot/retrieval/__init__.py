@@ -0,0 +1,45 @@
+"""
+ContractCopilot Retrieval
+
+Clause retrieval infrastructure for the agentic pipeline:
+- tokenizer: Shared tokenizer for clauses and queries
+- index_cache: Content-addressed cache of clause indexes
+- bm25: Vectorized NumPy BM25 engine
+- inverted_index: Posting-list keyword index for the fallback path
+- clause_store: Packed, array-backed clause corpus usable as a clause list
+- corpus_file: Versioned, memory-mapped on-disk corpus and BM25 index
+- portfolio: Cross-contract search with per-contract grouping and metadata filters
+- incremental: BM25 index updated in place as a contract is edited
+"""
+
+from .tokenizer import tokenize, TOKENIZER_VERSION
+from .index_cache import IndexCache, clauses_fingerprint, get_index_cache
+from .bm25 import BM25Index, top_k_scores
+from .inverted_index import InvertedIndex
+from .clause_store import ClauseStore, ClauseView, clause_snippet
+from .corpus_file import CORPUS_FORMAT_VERSION, MappedCorpus, open_corpus, write_corpus
+from .portfolio import ContractHit, ContractLocator, PortfolioIndex, contract_locator
+from .incremental import IncrementalBM25Index
+
+__all__ = [
+    "tokenize",
+    "TOKENIZER_VERSION",
+    "IndexCache",
+    "clauses_fingerprint",
+    "get_index_cache",
+    "BM25Index",
+    "top_k_scores",
+    "InvertedIndex",
+    "ClauseStore",
+    "ClauseView",
+    "clause_snippet",
+    "CORPUS_FORMAT_VERSION",
+    "MappedCorpus",
+    "open_corpus",
+    "write_corpus",
+    "ContractHit",
+    "ContractLocator",
+    "PortfolioIndex",
+    "contract_locator",
+    "IncrementalBM25Index"
+]
@@ -0,0 +1,91 @@
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a sparse term-document matrix.
+
+    Postings are stored term-major in CSR form (``indptr`` per term, clause ids
+    and term frequencies), with IDF and per-clause length norms precomputed at
+    build time, so scoring a query is a handful of vectorized gathers.
+    Scores match ``rank_bm25.BM25Okapi`` for the same parameters.
+    """
+
+    def __init__(self, tokenized: Sequence[List[str]], k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.n_docs = len(tokenized)
+
+        postings: Dict[str, Dict[int, int]] = {}
+        doc_len = np.zeros(self.n_docs, dtype=np.float64)
+        for doc_id, tokens in enumerate(tokenized):
+            doc_len[doc_id] = len(tokens)
+            for tok in tokens:
+                tf = postings.setdefault(tok, {})
+                tf[doc_id] = tf.get(doc_id, 0) + 1
+
+        self.vocab: Dict[str, int] = {}
+        indptr = np.zeros(len(postings) + 1, dtype=np.int64)
+        doc_ids: List[int] = []
+        freqs: List[int] = []
+        for term_id, (term, tf) in enumerate(postings.items()):
+            self.vocab[term] = term_id
+            doc_ids.extend(tf.keys())
+            freqs.extend(tf.values())
+            indptr[term_id + 1] = len(doc_ids)
+
+        self.indptr = indptr
+        self.doc_ids = np.asarray(doc_ids, dtype=np.int32)
+        self.tf = np.asarray(freqs, dtype=np.float32)
+        self.doc_len = doc_len
+        self.avgdl = float(doc_len.mean()) if self.n_docs else 0.0
+
+        # Same IDF flooring as BM25Okapi: negative IDFs become epsilon * mean IDF
+        df = np.diff(indptr).astype(np.float64)
+        idf = np.log(self.n_docs - df + 0.5) - np.log(df + 0.5)
+        if len(idf):
+            idf[idf < 0] = self.epsilon * idf.mean()
+        self.idf = idf
+        self.norm = self.k1 * (1 - self.b + self.b * doc_len / (self.avgdl or 1.0))
+
+    def term_ids(self, query_tokens: List[str]) -> List[int]:
+        """Ids of the query tokens present in the vocabulary."""
+        return [self.vocab[t] for t in query_tokens if t in self.vocab]
+
+    def get_scores(self, query_tokens: List[str]) -> np.ndarray:
+        """BM25 score of every clause for the tokenized query."""
+        term_ids = self.term_ids(query_tokens)
+        if not term_ids or not self.n_docs:
+            return np.zeros(self.n_docs, dtype=np.float64)
+        starts = self.indptr[term_ids]
+        ends = self.indptr[np.asarray(term_ids) + 1]
+        lengths = ends - starts
+        # Gather every posting of every query term in one shot
+        positions = np.repeat(ends - lengths.cumsum(), lengths) + np.arange(lengths.sum())
+        docs = self.doc_ids[positions]
+        tf = self.tf[positions]
+        idf = np.repeat(self.idf[term_ids], lengths)
+        weights = idf * tf * (self.k1 + 1) / (tf + self.norm[docs])
+        return np.bincount(docs, weights=weights, minlength=self.n_docs)
+
+    def top_k(self, query_tokens: List[str], k: int = 5) -> List[Tuple[int, float]]:
+        """Highest-scoring ``k`` clauses as ``(index, score)``, best first."""
+        scores = self.get_scores(query_tokens)
+        return top_k_scores(scores, k)
+
+
+def top_k_scores(scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """Select the top-k entries via a partition; ties keep clause order."""
+    n = len(scores)
+    if n == 0 or k <= 0:
+        return []
+    k = min(k, n)
+    threshold = scores[np.argpartition(scores, n - k)[n - k]]
+    above = np.flatnonzero(scores > threshold)
+    tied = np.flatnonzero(scores == threshold)[:k - len(above)]
+    candidates = np.concatenate([above, tied])
+    order = np.lexsort((candidates, -scores[candidates]))
+    return [(int(i), float(scores[i])) for i in candidates[order]]
@@ -0,0 +1,153 @@
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+class ClauseView:
+    """One clause of a ClauseStore, resolved to text only when asked."""
+    __slots__ = ("store", "index")
+
+    def __init__(self, store: "ClauseStore", index: int):
+        self.store = store
+        self.index = index
+
+    @property
+    def text(self) -> str:
+        return self.store[self.index]
+
+    @property
+    def start(self) -> int:
+        return int(self.store.offsets[self.index])
+
+    @property
+    def end(self) -> int:
+        return self.start + int(self.store.lengths[self.index])
+
+    @property
+    def contract(self) -> str:
+        return self.store.contract_of(self.index)
+
+    def snippet(self, max_chars: int) -> str:
+        return self.store.snippet(self.index, max_chars)
+
+    def __len__(self) -> int:
+        return int(self.store.lengths[self.index])
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return f"ClauseView(index={self.index}, contract={self.contract!r}, start={self.start}, end={self.end})"
+
+
+class ClauseStore(Sequence[str]):
+    """
+    A clause corpus packed into one text buffer plus NumPy arrays of clause
+    offsets, lengths and contract ids.
+
+    Behaves like a read-only ``List[str]`` (len, indexing, iteration), so it can
+    be passed anywhere a clause list is accepted; clause strings are sliced out
+    of the buffer on access instead of being kept as millions of objects.
+    """
+    __slots__ = ("buffer", "offsets", "lengths", "contract_ids", "contract_names", "fingerprints")
+
+    def __init__(self, buffer: str, offsets: np.ndarray, lengths: np.ndarray,
+                 contract_ids: Optional[np.ndarray] = None, contract_names: Optional[List[str]] = None):
+        if len(offsets) != len(lengths):
+            raise ValueError("offsets and lengths must have the same length")
+        self.buffer = buffer
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.lengths = np.asarray(lengths, dtype=np.int32)
+        if contract_ids is None:
+            contract_ids = np.zeros(len(self.offsets), dtype=np.int32)
+        self.contract_ids = np.asarray(contract_ids, dtype=np.int32)
+        self.contract_names = list(contract_names) if contract_names is not None else [""]
+        # Content hashes by cache namespace; the store is read-only, so they are computed once
+        self.fingerprints: Dict[str, str] = {}
+
+    @classmethod
+    def from_texts(cls, clauses: Iterable[str], contract_name: str = "") -> "ClauseStore":
+        """Pack an existing clause list (one buffer copy, then the strings can be freed)."""
+        clauses = list(clauses)
+        lengths = np.fromiter((len(c) for c in clauses), dtype=np.int64, count=len(clauses))
+        offsets = np.zeros(len(clauses), dtype=np.int64)
+        if len(clauses) > 1:
+            np.cumsum(lengths[:-1], out=offsets[1:])
+        return cls("".join(clauses), offsets, lengths, None, [contract_name])
+
+    @classmethod
+    def from_spans(cls, documents: Iterable[Tuple[str, str, Sequence[Tuple[int, int]]]]) -> "ClauseStore":
+        """
+        Build a store from ``(contract_name, text, spans)`` triples, where spans are
+        ``(start, end)`` offsets into ``text`` (or objects with ``start``/``end``).
+        Document texts are concatenated once; clauses are never copied individually.
+        """
+        parts: List[str] = []
+        names: List[str] = []
+        offsets: List[np.ndarray] = []
+        lengths: List[np.ndarray] = []
+        contract_ids: List[np.ndarray] = []
+        base = 0
+        for contract_id, (name, text, spans) in enumerate(documents):
+            bounds = np.array([_bounds(span) for span in spans], dtype=np.int64).reshape(-1, 2)
+            parts.append(text)
+            names.append(name)
+            offsets.append(bounds[:, 0] + base)
+            lengths.append(bounds[:, 1] - bounds[:, 0])
+            contract_ids.append(np.full(len(bounds), contract_id, dtype=np.int32))
+            base += len(text)
+        if not parts:
+            return cls("", np.zeros(0, np.int64), np.zeros(0, np.int32), None, [])
+        return cls("".join(parts), np.concatenate(offsets), np.concatenate(lengths),
+                   np.concatenate(contract_ids), names)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            # Views share the buffer and contract names
+            return type(self)(self.buffer, self.offsets[index], self.lengths[index],
+                              self.contract_ids[index], self.contract_names)
+        start = int(self.offsets[index])
+        return self.buffer[start:start + int(self.lengths[index])]
+
+    def __iter__(self) -> Iterator[str]:
+        buffer = self.buffer
+        for start, length in zip(self.offsets.tolist(), self.lengths.tolist()):
+            yield buffer[start:start + length]
+
+    def clause(self, index: int) -> ClauseView:
+        if not -len(self) <= index < len(self):
+            raise IndexError("clause index out of range")
+        return ClauseView(self, index % len(self))
+
+    def snippet(self, index: int, max_chars: int) -> str:
+        """First ``max_chars`` characters of a clause, without slicing out the whole clause."""
+        start = int(self.offsets[index])
+        return self.buffer[start:start + min(int(self.lengths[index]), max_chars)]
+
+    def clause_length(self, index: int) -> int:
+        return int(self.lengths[index])
+
+    def contract_of(self, index: int) -> str:
+        return self.contract_names[int(self.contract_ids[index])]
+
+    def nbytes(self) -> int:
+        """Approximate memory held: buffer plus arrays."""
+        return sys.getsizeof(self.buffer) + self.offsets.nbytes + self.lengths.nbytes + self.contract_ids.nbytes
+
+
+def _bounds(span) -> Tuple[int, int]:
+    if isinstance(span, tuple):
+        return span
+    return span.start, span.end
+
+
+def clause_snippet(clauses: Sequence[str], index: int, max_chars: int) -> Tuple[str, bool]:
+    """``(snippet, truncated)`` for a clause of a list or ClauseStore."""
+    if isinstance(clauses, ClauseStore):
+        return clauses.snippet(index, max_chars), clauses.clause_length(index) > max_chars
+    clause = clauses[index]
+    return clause[:max_chars], len(clause) > max_chars
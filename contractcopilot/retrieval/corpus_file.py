@@ -0,0 +1,250 @@
+"""
+Versioned on-disk corpus + BM25 index, opened with mmap.
+
+Layout (every section starts on a 64-byte boundary)::
+
+    magic (8 bytes) | format version (u32) | reserved (u32) | metadata length (u64)
+    metadata (UTF-8 JSON: parameters, contract names, section table)
+    sections: text, clause_offsets, clause_lengths, contract_ids,
+              vocab_blob, vocab_offsets, indptr, doc_ids, tf, idf, doc_len, norm
+
+Clause text is stored as UTF-8 with byte offsets; the vocabulary is sorted by
+UTF-8 bytes so terms are found by binary search without building a dict.
+Arrays are NumPy views over the mapping, so opening a corpus reads nothing but
+the header and every process that opens it shares the same page cache.
+"""
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .bm25 import BM25Index
+from .clause_store import ClauseStore
+from .tokenizer import TOKENIZER_VERSION, tokenize
+
+MAGIC = b"CCCORPUS"
+CORPUS_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sIIQ")
+_ALIGN = 64
+
+
+def write_corpus(path: str, clauses: Sequence[str], index: Optional[BM25Index] = None) -> None:
+    """
+    Write ``clauses`` (a list or ClauseStore) and their BM25 index to ``path``.
+    The index is built here when not given. The file is replaced atomically.
+    """
+    store = clauses if isinstance(clauses, ClauseStore) else ClauseStore.from_texts(clauses)
+    if index is None:
+        index = BM25Index([tokenize(c) for c in store])
+    if index.n_docs != len(store):
+        raise ValueError("index does not match the clause count")
+
+    # Clause text as one UTF-8 blob with byte offsets
+    encoded = [clause.encode("utf-8") for clause in store]
+    clause_lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+    clause_offsets = np.zeros(len(encoded), dtype=np.int64)
+    if len(encoded) > 1:
+        np.cumsum(clause_lengths[:-1], out=clause_offsets[1:])
+
+    # Vocabulary sorted by UTF-8 bytes; postings permuted to match
+    terms = sorted((term.encode("utf-8"), term_id) for term, term_id in index.vocab.items())
+    order = np.array([term_id for _, term_id in terms], dtype=np.int64)
+    term_lengths = np.fromiter((len(t) for t, _ in terms), dtype=np.int64, count=len(terms))
+    vocab_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(term_lengths, out=vocab_offsets[1:])
+    starts, ends = index.indptr[order], index.indptr[order + 1]
+    counts = ends - starts
+    indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    positions = np.repeat(ends - counts.cumsum(), counts) + np.arange(counts.sum(), dtype=np.int64)
+
+    sections = {
+        "text": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "clause_offsets": clause_offsets,
+        "clause_lengths": clause_lengths.astype(np.int32),
+        "contract_ids": store.contract_ids.astype(np.int32),
+        "vocab_blob": np.frombuffer(b"".join(t for t, _ in terms), dtype=np.uint8),
+        "vocab_offsets": vocab_offsets,
+        "indptr": indptr,
+        "doc_ids": index.doc_ids[positions].astype(np.int32),
+        "tf": index.tf[positions].astype(np.float32),
+        "idf": np.asarray(index.idf, dtype=np.float64)[order],
+        "doc_len": index.doc_len.astype(np.int32),
+        "norm": index.norm.astype(np.float64),
+    }
+    meta: Dict[str, Any] = {
+        "tokenizer_version": TOKENIZER_VERSION,
+        "k1": index.k1, "b": index.b, "epsilon": index.epsilon,
+        "n_docs": index.n_docs, "avgdl": index.avgdl,
+        "contract_names": store.contract_names,
+        "sections": {},
+    }
+    # Section offsets are relative to the data area after the metadata
+    position = 0
+    for name, array in sections.items():
+        meta["sections"][name] = {"offset": position, "dtype": array.dtype.str, "count": int(array.size)}
+        position = _aligned(position + array.nbytes)
+    meta_bytes = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+    data_start = _aligned(_HEADER.size + len(meta_bytes))
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, CORPUS_FORMAT_VERSION, 0, len(meta_bytes)))
+            f.write(meta_bytes)
+            for name, array in sections.items():
+                f.seek(data_start + meta["sections"][name]["offset"])
+                f.write(np.ascontiguousarray(array).tobytes())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def open_corpus(path: str) -> "MappedCorpus":
+    return MappedCorpus(path)
+
+
+class MappedCorpus:
+    """
+    A corpus file opened with mmap. ``clauses`` behaves like a clause list and
+    ``index`` like a BM25Index; both read straight from the mapping.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, meta_len = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a corpus file")
+        if version != CORPUS_FORMAT_VERSION:
+            raise ValueError(f"Unsupported corpus format version {version} (expected {CORPUS_FORMAT_VERSION})")
+        self.meta = json.loads(bytes(self._mmap[_HEADER.size:_HEADER.size + meta_len]).decode("utf-8"))
+        if self.meta["tokenizer_version"] != TOKENIZER_VERSION:
+            raise ValueError("Corpus was built with a different tokenizer version; rebuild it")
+        data_start = _aligned(_HEADER.size + meta_len)
+        self.arrays = {name: self._section(data_start, spec) for name, spec in self.meta["sections"].items()}
+        self.index = MappedBM25Index(self.arrays, self.meta)
+        self.clauses = MappedClauseStore(
+            self.arrays["text"], self.arrays["clause_offsets"], self.arrays["clause_lengths"],
+            self.arrays["contract_ids"], self.meta["contract_names"], bm25=self.index,
+        )
+
+    def _section(self, data_start: int, spec: Dict[str, Any]) -> np.ndarray:
+        dtype = np.dtype(spec["dtype"])
+        if not spec["count"]:
+            return np.zeros(0, dtype=dtype)
+        return np.frombuffer(self._mmap, dtype=dtype, count=spec["count"], offset=data_start + spec["offset"])
+
+    @property
+    def contract_names(self) -> List[str]:
+        return self.meta["contract_names"]
+
+    def close(self) -> None:
+        # Views must go before the mapping can be closed
+        self.arrays = {}
+        self.index = self.clauses = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Views are still referenced elsewhere; the mapping is released with them
+            pass
+
+    def __enter__(self) -> "MappedCorpus":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class MappedClauseStore(ClauseStore):
+    """
+    ClauseStore over a UTF-8 byte buffer (offsets and lengths in bytes).
+    Carries the corpus BM25 index as ``bm25`` so retrieval can skip rebuilding it.
+    """
+    __slots__ = ("bm25",)
+
+    def __init__(self, buffer, offsets, lengths, contract_ids=None, contract_names=None, bm25=None):
+        super().__init__(buffer, offsets, lengths, contract_ids, contract_names)
+        self.bm25 = bm25
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # A slice is a different clause set; the whole-corpus index no longer applies
+            return MappedClauseStore(self.buffer, self.offsets[index], self.lengths[index],
+                                     self.contract_ids[index], self.contract_names)
+        start = int(self.offsets[index])
+        return self.buffer[start:start + int(self.lengths[index])].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        buffer = self.buffer
+        for start, length in zip(self.offsets.tolist(), self.lengths.tolist()):
+            yield buffer[start:start + length].tobytes().decode("utf-8")
+
+    def snippet(self, index: int, max_chars: int) -> str:
+        start = int(self.offsets[index])
+        # At most 4 bytes per character; a cut inside a character is dropped
+        end = start + min(int(self.lengths[index]), max_chars * 4)
+        return self.buffer[start:end].tobytes().decode("utf-8", errors="ignore")[:max_chars]
+
+    def clause_length(self, index: int) -> int:
+        return len(self[index])
+
+    def nbytes(self) -> int:
+        return self.buffer.nbytes + self.offsets.nbytes + self.lengths.nbytes + self.contract_ids.nbytes
+
+
+class MappedBM25Index(BM25Index):
+    """BM25Index whose arrays are views over a corpus file; terms are found by binary search."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+        self.k1 = meta["k1"]
+        self.b = meta["b"]
+        self.epsilon = meta["epsilon"]
+        self.n_docs = meta["n_docs"]
+        self.avgdl = meta["avgdl"]
+        self.indptr = arrays["indptr"]
+        self.doc_ids = arrays["doc_ids"]
+        self.tf = arrays["tf"]
+        self.idf = arrays["idf"]
+        self.doc_len = arrays["doc_len"]
+        self.norm = arrays["norm"]
+        self._vocab_blob = arrays["vocab_blob"]
+        self._vocab_offsets = arrays["vocab_offsets"]
+
+    @property
+    def n_terms(self) -> int:
+        return len(self._vocab_offsets) - 1
+
+    def term(self, term_id: int) -> bytes:
+        return self._vocab_blob[self._vocab_offsets[term_id]:self._vocab_offsets[term_id + 1]].tobytes()
+
+    def find_term(self, term: str) -> int:
+        """Term id of ``term``, or -1 when it is not in the vocabulary."""
+        key = term.encode("utf-8")
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self.n_terms and self.term(lo) == key else -1
+
+    def term_ids(self, query_tokens: List[str]) -> List[int]:
+        found = (self.find_term(t) for t in query_tokens)
+        return [term_id for term_id in found if term_id >= 0]
+
+    @property
+    def vocab(self) -> Dict[str, int]:
+        """Materialized term -> id dict (for inspection; scoring does not need it)."""
+        return {self.term(i).decode("utf-8"): i for i in range(self.n_terms)}
+
+
+def _aligned(position: int) -> int:
+    return (position + _ALIGN - 1) // _ALIGN * _ALIGN
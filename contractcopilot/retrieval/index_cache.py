@@ -0,0 +1,141 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional
+
+from .clause_store import ClauseStore
+from .tokenizer import TOKENIZER_VERSION
+
+
+def clauses_fingerprint(clauses: List[str], namespace: str = "") -> str:
+    """
+    Content hash of a clause list (and tokenizer version) used as the cache key.
+    Clauses are length-prefixed so ["ab", "c"] and ["a", "bc"] never collide.
+    A ClauseStore is hashed once per namespace and the result kept on the store.
+    """
+    if isinstance(clauses, ClauseStore):
+        fingerprint = clauses.fingerprints.get(namespace)
+        if fingerprint is None:
+            fingerprint = clauses.fingerprints[namespace] = _hash_clauses(clauses, namespace)
+        return fingerprint
+    return _hash_clauses(clauses, namespace)
+
+
+def _hash_clauses(clauses: List[str], namespace: str) -> str:
+    h = hashlib.sha256()
+    h.update(f"{namespace}|tok{TOKENIZER_VERSION}|{len(clauses)}|".encode("utf-8"))
+    for clause in clauses:
+        data = clause.encode("utf-8")
+        h.update(f"{len(data)}:".encode("utf-8"))
+        h.update(data)
+    return h.hexdigest()
+
+
+class IndexCache:
+    """
+    Content-addressed cache of retrieval indexes.
+
+    Entries are held in an in-memory LRU; when ``cache_dir`` is set they are
+    also pickled to disk so a new process can reuse indexes built earlier.
+    """
+
+    def __init__(self, max_entries: int = 32, cache_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def get_or_build(self, clauses: List[str], builder: Callable[[List[str]], Any], namespace: str = "") -> Any:
+        """Return the cached index for ``clauses``, building it with ``builder`` on a miss."""
+        key = clauses_fingerprint(clauses, namespace)
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            self.misses += 1
+        value = builder(clauses)
+        self.put(key, value)
+        return value
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        value = self._load(key)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+                self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._remember(key, value)
+        self._store(key, value)
+
+    def clear(self) -> None:
+        """Drop all in-memory entries (on-disk entries are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    # --- internal ---
+    def _remember(self, key: str, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def _load(self, key: str) -> Any:
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    def _store(self, key: str, value: Any) -> None:
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+_default_cache: Optional[IndexCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_index_cache() -> IndexCache:
+    """
+    Process-wide index cache shared by all agents.
+    Set CONTRACTCOPILOT_INDEX_CACHE_DIR to persist indexes across restarts.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = IndexCache(
+                max_entries=int(os.getenv("CONTRACTCOPILOT_INDEX_CACHE_SIZE", "32")),
+                cache_dir=os.getenv("CONTRACTCOPILOT_INDEX_CACHE_DIR") or None,
+            )
+        return _default_cache
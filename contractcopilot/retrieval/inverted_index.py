@@ -0,0 +1,36 @@
+import heapq
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+from .tokenizer import tokenize
+
+
+class InvertedIndex:
+    """
+    Term -> posting list of clause ids, built once per clause list.
+
+    Scores a query by the number of distinct query terms a clause contains,
+    touching only the postings of those terms.
+    """
+
+    def __init__(self, clauses: Sequence[str]):
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for clause_id, clause in enumerate(clauses):
+            for term in set(tokenize(clause)):
+                postings[term].append(clause_id)
+        self.postings: Dict[str, List[int]] = dict(postings)
+        self.n_docs = len(clauses)
+
+    def scores(self, query: str) -> Dict[int, int]:
+        """Matched-term count for every clause sharing at least one query term."""
+        counts: Dict[int, int] = defaultdict(int)
+        for term in set(tokenize(query)):
+            for clause_id in self.postings.get(term, ()):
+                counts[clause_id] += 1
+        return counts
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
+        """Top-k ``(index, score)`` pairs, best first; ties keep clause order."""
+        counts = self.scores(query)
+        best = heapq.nsmallest(top_k, counts.items(), key=lambda item: (-item[1], item[0]))
+        return [(clause_id, float(score)) for clause_id, score in best]
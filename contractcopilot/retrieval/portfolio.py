@@ -0,0 +1,154 @@
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .bm25 import BM25Index, top_k_scores
+from .clause_store import ClauseStore
+from .tokenizer import tokenize
+
+# A metadata filter value: exact match (strings compare case-insensitively),
+# any-of for lists/sets/tuples, or a predicate over the contract's value
+FilterValue = Union[Any, Sequence[Any], Callable[[Any], bool]]
+
+
+class ContractLocator:
+    """
+    Clause index -> contract name by binary search over contract start indices.
+    Built from a ``file_map`` of ``(contract_name, start, end)`` ranges.
+    """
+
+    def __init__(self, file_map: Iterable[Tuple[str, int, int]]):
+        ranges = sorted(file_map, key=lambda item: item[1])
+        self.starts = [start for _, start, _ in ranges]
+        self.ends = [end for _, _, end in ranges]
+        self.names = [name for name, _, _ in ranges]
+
+    def __call__(self, index: int) -> Optional[str]:
+        pos = bisect_right(self.starts, index) - 1
+        if pos >= 0 and index < self.ends[pos]:
+            return self.names[pos]
+        return None
+
+
+def contract_locator(clauses: Sequence[str],
+                     file_map: Optional[List[Tuple[str, int, int]]] = None) -> Optional[Callable[[int], Optional[str]]]:
+    """Contract lookup for ``clauses``: from ``file_map`` if given, else from a multi-contract ClauseStore."""
+    if file_map:
+        return ContractLocator(file_map)
+    if isinstance(clauses, ClauseStore) and len(clauses.contract_names) > 1:
+        return clauses.contract_of
+    return None
+
+
+@dataclass
+class ContractHit:
+    """One contract in a portfolio search, with its best-matching clauses."""
+    contract: str
+    score: float
+    metadata: Dict[str, Any]
+    clauses: List[Tuple[int, float]] = field(default_factory=list)  # (clause index, score), best first
+
+
+class PortfolioIndex:
+    """
+    Clause retrieval across many contracts with results grouped per contract.
+
+    Clauses live in one ClauseStore (contracts as contiguous runs of clauses);
+    one BM25 pass scores the whole portfolio, contracts are ranked by their best
+    clause, and an optional metadata filter restricts which contracts qualify.
+    Clause -> contract lookups are a binary search over run starts.
+    """
+
+    def __init__(self, clauses: ClauseStore, metadata: Optional[Dict[str, Dict[str, Any]]] = None,
+                 index: Optional[BM25Index] = None):
+        self.clauses = clauses
+        self.metadata = metadata or {}
+        if index is None:
+            # Memory-mapped corpora carry their own index
+            index = getattr(clauses, "bm25", None)
+        self.index = index if index is not None else BM25Index([tokenize(c) for c in clauses])
+        ids = clauses.contract_ids
+        if len(ids):
+            self.run_starts = np.flatnonzero(np.concatenate([[True], ids[1:] != ids[:-1]]))
+        else:
+            self.run_starts = np.zeros(0, dtype=np.int64)
+        self.run_ids = ids[self.run_starts]
+        self.run_ends = np.append(self.run_starts[1:], len(ids))
+
+    @classmethod
+    def from_corpus(cls, path: str, metadata: Optional[Dict[str, Dict[str, Any]]] = None) -> "PortfolioIndex":
+        """Open a portfolio written with ``write_corpus`` (memory-mapped)."""
+        from .corpus_file import open_corpus
+        corpus = open_corpus(path)
+        return cls(corpus.clauses, metadata, corpus.index)
+
+    @property
+    def contract_names(self) -> List[str]:
+        return self.clauses.contract_names
+
+    def __len__(self) -> int:
+        return len(self.contract_names)
+
+    def contract_of(self, clause_index: int) -> str:
+        run = int(np.searchsorted(self.run_starts, clause_index, side="right")) - 1
+        return self.contract_names[int(self.run_ids[run])]
+
+    def contract_clauses(self, contract: str) -> List[int]:
+        """Clause indices belonging to ``contract``, in order."""
+        contract_id = self.contract_names.index(contract)
+        runs = np.flatnonzero(self.run_ids == contract_id)
+        return [i for run in runs for i in range(int(self.run_starts[run]), int(self.run_ends[run]))]
+
+    def matching_contracts(self, filters: Optional[Dict[str, FilterValue]] = None) -> np.ndarray:
+        """Boolean mask over contract ids of contracts whose metadata passes ``filters``."""
+        mask = np.ones(len(self.contract_names), dtype=bool)
+        if not filters:
+            return mask
+        for contract_id, name in enumerate(self.contract_names):
+            meta = self.metadata.get(name, {})
+            mask[contract_id] = all(_matches(meta.get(key), wanted) for key, wanted in filters.items())
+        return mask
+
+    def search(self, query: str, top_contracts: int = 10, clauses_per_contract: int = 3,
+               filters: Optional[Dict[str, FilterValue]] = None) -> List[ContractHit]:
+        """Contracts ranked by their best clause for ``query``, each with its top clauses."""
+        if not len(self.clauses) or top_contracts <= 0:
+            return []
+        scores = self.index.get_scores(tokenize(query))
+        # Best clause score per contract: max within each run, then across a contract's runs
+        best = np.full(len(self.contract_names), -np.inf)
+        np.maximum.at(best, self.run_ids, np.maximum.reduceat(scores, self.run_starts))
+        best[~self.matching_contracts(filters)] = -np.inf
+        best[best <= 0] = -np.inf  # no query term matched
+        hits = []
+        for contract_id, score in top_k_scores(best, top_contracts):
+            if not np.isfinite(score):
+                break
+            name = self.contract_names[contract_id]
+            runs = np.flatnonzero(self.run_ids == contract_id)
+            ids = np.concatenate([np.arange(self.run_starts[r], self.run_ends[r]) for r in runs])
+            top = top_k_scores(scores[ids], clauses_per_contract)
+            hits.append(ContractHit(
+                contract=name,
+                score=score,
+                metadata=self.metadata.get(name, {}),
+                clauses=[(int(ids[i]), s) for i, s in top if s > 0],
+            ))
+        return hits
+
+
+def _matches(value: Any, wanted: FilterValue) -> bool:
+    if callable(wanted):
+        try:
+            return bool(wanted(value))
+        except Exception:
+            return False
+    if isinstance(wanted, (list, tuple, set, frozenset)):
+        return any(_matches(value, option) for option in wanted)
+    if isinstance(value, (list, tuple, set)):
+        return any(_matches(item, wanted) for item in value)
+    if isinstance(value, str) and isinstance(wanted, str):
+        return value.strip().lower() == wanted.strip().lower()
+    return value == wanted
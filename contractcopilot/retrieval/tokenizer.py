@@ -0,0 +1,10 @@
+from typing import List
+
+# Bump whenever tokenize() changes so cached indexes built with the old
+# tokenizer are never served for new queries.
+TOKENIZER_VERSION = 1
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokenize clause or query text for keyword retrieval."""
+    return text.lower().split()
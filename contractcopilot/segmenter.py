@@ -0,0 +1,204 @@
+"""
+Single-pass clause segmentation.
+
+Contract text is cut into clauses at blank lines and at numbered section
+markers (``SECTION 2.``, ``ARTICLE 3.``, ``4.1.``, ``5.``). Each clause is a
+``ClauseSpan`` record of character offsets into the source plus the section
+number and heading it belongs to, so callers can keep one copy of the text and
+point citations back into it. Section markers stay with the clause they
+introduce, and heading-only paragraphs (``## Parties``) label the clauses that
+follow instead of becoming clauses themselves.
+"""
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from retrieval import ClauseStore
+
+# Clause boundaries: a blank line, or a line starting with a section marker
+_BOUNDARY = re.compile(
+    r"(?:\r?\n){2,}|\r?\n\s*(?=(?:SECTION\s+\d+\.|ARTICLE\s+\d+\.|\d+\.\d+\.|\d+\.)\s)",
+    re.IGNORECASE,
+)
+# Section marker at the start of a clause; group 1 is the section number
+_MARKER = re.compile(r"(?:SECTION\s+|ARTICLE\s+)?(\d+(?:\.\d+)*)\.\s+", re.IGNORECASE)
+# Letters of the SECTION/ARTICLE marker words (for holding back a partial marker)
+_MARKER_LETTERS = frozenset("SECTIONARL")
+# Markdown heading line
+_HEADING = re.compile(r"#{1,6}\s+(.+)")
+
+MAX_HEADING_CHARS = 120
+
+
+class ClauseSpan:
+    """One clause: ``source[start:end]``, with its section number and heading (if any)."""
+    __slots__ = ("start", "end", "section", "heading")
+
+    def __init__(self, start: int, end: int, section: Optional[str] = None, heading: Optional[str] = None):
+        self.start = start
+        self.end = end
+        self.section = section
+        self.heading = heading
+
+    def text(self, source: str) -> str:
+        return source[self.start:self.end]
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ClauseSpan) and (
+            (self.start, self.end, self.section, self.heading) == (other.start, other.end, other.section, other.heading)
+        )
+
+    def __repr__(self) -> str:
+        return f"ClauseSpan(start={self.start}, end={self.end}, section={self.section!r}, heading={self.heading!r})"
+
+
+def segment_clauses(text: str) -> List[ClauseSpan]:
+    """Clause records for ``text``; offsets index into ``text`` itself."""
+    if not text:
+        return []
+    return list(iter_clause_spans([text]))
+
+
+def build_clause_store(documents: Iterable[Tuple[str, str]]) -> ClauseStore:
+    """Segment ``(contract_name, text)`` documents straight into one packed ClauseStore."""
+    return ClauseStore.from_spans((name, text, segment_clauses(text)) for name, text in documents)
+
+
+def iter_clause_spans(chunks: Iterable[str]) -> Iterator[ClauseSpan]:
+    """Streaming ``segment_clauses``: offsets index into the concatenated chunks."""
+    for _, _, span in _scan(chunks):
+        yield span
+
+
+def iter_segments(chunks: Iterable[str]) -> Iterator[Tuple[ClauseSpan, str]]:
+    """
+    Consume text chunks and yield ``(span, clause_text)`` as soon as each clause
+    is complete. The text is sliced out only here; span-only callers use
+    ``iter_clause_spans`` and never copy clause text.
+    """
+    for buf, base, span in _scan(chunks):
+        yield span, buf[span.start - base:span.end - base]
+
+
+def _scan(chunks: Iterable[str]) -> Iterator[Tuple[str, int, ClauseSpan]]:
+    """
+    Yield ``(buffer, base, span)`` for each clause as soon as it is complete,
+    where ``buffer[span.start - base:span.end - base]`` is the clause text.
+    Each chunk is scanned once: only the short tail that could still start a
+    boundary is rescanned with the next chunk, and the already-scanned text of
+    an unfinished clause is kept as pieces and joined once when the clause
+    ends. Work is linear in the text however it is chunked.
+    """
+    state = _SegmentState()
+    held: List[str] = []  # scanned text of the unfinished clause, before ``window``
+    held_len = 0
+    window = ""           # text from the earliest position a boundary could still start
+    base = 0              # offset of window[0] in the full text
+    for chunk in chunks:
+        if not chunk:
+            continue
+        window += chunk
+        # A boundary touching trailing whitespace may still grow with the next chunk
+        safe_end = _content_end(window)
+        consumed = 0
+        cut = None
+        for m in _BOUNDARY.finditer(window):
+            if m.end() >= safe_end:
+                cut = m.start()
+                break
+            if held:
+                held.append(window[:m.start()])
+                clause = "".join(held)
+                span = state.emit(clause, 0, len(clause), base - held_len)
+                if span:
+                    yield clause, base - held_len, span
+                held, held_len = [], 0
+            else:
+                span = state.emit(window, consumed, m.start(), base)
+                if span:
+                    yield window, base, span
+            consumed = m.end()
+        if cut is None:
+            cut = max(consumed, _pending_start(window))
+        if cut > consumed:
+            held.append(window[consumed:cut])
+            held_len += cut - consumed
+        window = window[cut:]
+        base += cut
+    if held:
+        window = "".join(held) + window
+        base -= held_len
+    consumed = 0
+    for m in _BOUNDARY.finditer(window):
+        span = state.emit(window, consumed, m.start(), base)
+        if span:
+            yield window, base, span
+        consumed = m.end()
+    span = state.emit(window, consumed, len(window), base)
+    if span:
+        yield window, base, span
+
+
+def _content_end(buf: str) -> int:
+    """Index just past the last non-whitespace character (``len(buf.rstrip())`` without the copy)."""
+    end = len(buf)
+    while end and buf[end - 1].isspace():
+        end -= 1
+    return end
+
+
+def _pending_start(buf: str) -> int:
+    """
+    Earliest position at which a boundary match could still need more text.
+    An unfinished match (line break, whitespace, partial section marker) only
+    spans characters a boundary can contain, so walk back over those.
+    """
+    start = len(buf)
+    while start and _boundary_char(buf[start - 1]):
+        start -= 1
+    return start
+
+
+def _boundary_char(ch: str) -> bool:
+    return ch.isspace() or ch.isdecimal() or ch == "." or ch.upper() in _MARKER_LETTERS
+
+
+class _SegmentState:
+    """Section number and heading carried from one clause to the next."""
+    __slots__ = ("section", "heading")
+
+    def __init__(self):
+        self.section = None
+        self.heading = None
+
+    def emit(self, buf: str, start: int, end: int, base: int) -> Optional[ClauseSpan]:
+        """The clause in ``buf[start:end]`` (None for blank or heading-only text)."""
+        # Trim surrounding whitespace by moving offsets, not by copying
+        while start < end and buf[start].isspace():
+            start += 1
+        while end > start and buf[end - 1].isspace():
+            end -= 1
+        if start == end:
+            return None
+        line_end = buf.find("\n", start, end)
+        first_line_end = end if line_end == -1 else line_end
+        heading = _HEADING.match(buf, start, first_line_end)
+        if heading:
+            self.heading = heading.group(1).strip()[:MAX_HEADING_CHARS]
+            if line_end == -1:
+                # A heading with no body labels the clauses after it
+                return None
+        else:
+            marker = _MARKER.match(buf, start, end)
+            if marker:
+                section = marker.group(1)
+                if self.section is None or section.split(".")[0] != self.section.split(".")[0]:
+                    # A new top-level section does not inherit the previous section's heading
+                    self.heading = None
+                self.section = section
+                if line_end != -1 and first_line_end - marker.end() <= MAX_HEADING_CHARS:
+                    # "3. Limitation of Liability\n..." -> heading on the marker line
+                    self.heading = buf[marker.end():first_line_end].strip() or self.heading
+        return ClauseSpan(base + start, base + end, self.section, self.heading)
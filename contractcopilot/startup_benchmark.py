@@ -0,0 +1,68 @@
+"""
+Cold-start import cost per module.
+
+Each module is imported in a fresh interpreter with ``-X importtime`` so the
+numbers match what a new container pays on its first request:
+
+    python startup_benchmark.py
+    python startup_benchmark.py --repeat 5 openai cohere
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import List, Optional
+
+# Third-party SDKs first, then the app's own modules (which should not pull them in)
+DEFAULT_MODULES = [
+    "streamlit",
+    "numpy",
+    "httpx",
+    "openai",
+    "cohere",
+    "groq",
+    "google.generativeai",
+    "utils.llm_client",
+    "retrieval",
+    "ingestion",
+    "agents",
+]
+
+
+def import_cost(module: str) -> Optional[float]:
+    """Cumulative import time of ``module`` in milliseconds, or None if it fails to import."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return None
+    # Lines look like "import time:   self [us] | cumulative | imported package"
+    for line in reversed(result.stderr.splitlines()):
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Report cold-start import cost per module.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="Modules to import")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per module (median is reported)")
+    args = parser.parse_args(argv)
+
+    print(f"{'module':<24} {'median ms':>10} {'min ms':>10}")
+    for module in args.modules:
+        samples = [import_cost(module) for _ in range(max(1, args.repeat))]
+        if any(sample is None for sample in samples):
+            print(f"{module:<24} {'not importable':>21}")
+            continue
+        print(f"{module:<24} {statistics.median(samples):>10.1f} {min(samples):>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from retrieval import BM25Index, top_k_scores, tokenize
+
+CLAUSES = [
+    "The Supplier shall indemnify the Customer against all claims arising from a data breach.",
+    "Liability of either party is limited to the fees paid in the twelve months before the claim.",
+    "Either party may terminate this Agreement on thirty days written notice.",
+    "Personal data shall be processed only on documented instructions from the Controller.",
+    "The Processor shall notify the Controller of a personal data breach without undue delay.",
+    "This Agreement is governed by the laws of the State of New York.",
+    "Confidential information excludes information that is publicly available.",
+    "The Supplier shall maintain insurance covering its liability under this Agreement.",
+]
+QUERIES = [
+    "data breach notification",
+    "limitation of liability",
+    "terminate agreement notice",
+    "the shall agreement",
+    "personal data personal",
+    "nothing matches here",
+]
+
+
+def okapi_scores(corpus, query, k1=1.5, b=0.75, epsilon=0.25):
+    """Straightforward BM25Okapi (same formula and IDF flooring as rank_bm25)."""
+    n = len(corpus)
+    avgdl = sum(len(doc) for doc in corpus) / n
+    df = {}
+    for doc in corpus:
+        for term in set(doc):
+            df[term] = df.get(term, 0) + 1
+    idf = {term: math.log(n - d + 0.5) - math.log(d + 0.5) for term, d in df.items()}
+    floor = epsilon * sum(idf.values()) / len(idf)
+    idf = {term: value if value >= 0 else floor for term, value in idf.items()}
+    scores = []
+    for doc in corpus:
+        score = 0.0
+        for term in query:
+            tf = doc.count(term)
+            if tf:
+                score += idf[term] * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc) / avgdl))
+        scores.append(score)
+    return np.array(scores)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_scores_match_okapi(query):
+    corpus = [tokenize(c) for c in CLAUSES]
+    index = BM25Index(corpus)
+    np.testing.assert_allclose(index.get_scores(tokenize(query)), okapi_scores(corpus, tokenize(query)), rtol=1e-6)
+
+
+def test_scores_match_rank_bm25():
+    rank_bm25 = pytest.importorskip("rank_bm25")
+    corpus = [tokenize(c) for c in CLAUSES]
+    index = BM25Index(corpus)
+    reference = rank_bm25.BM25Okapi(corpus)
+    for query in QUERIES:
+        np.testing.assert_allclose(index.get_scores(tokenize(query)), reference.get_scores(tokenize(query)), rtol=1e-6)
+
+
+def test_random_corpus_matches_okapi():
+    rng = random.Random(7)
+    vocab = [f"term{i}" for i in range(40)]
+    corpus = [[rng.choice(vocab) for _ in range(rng.randint(1, 30))] for _ in range(60)]
+    index = BM25Index(corpus)
+    for _ in range(20):
+        query = [rng.choice(vocab) for _ in range(rng.randint(1, 5))]
+        np.testing.assert_allclose(index.get_scores(query), okapi_scores(corpus, query), rtol=1e-6)
+
+
+def test_empty_index():
+    index = BM25Index([])
+    assert index.get_scores(["anything"]).shape == (0,)
+    assert index.top_k(["anything"], 5) == []
+
+
+def test_top_k_orders_by_score_then_clause_order():
+    scores = np.array([1.0, 3.0, 3.0, 2.0, 3.0, 0.0])
+    assert top_k_scores(scores, 2) == [(1, 3.0), (2, 3.0)]
+    assert top_k_scores(scores, 4) == [(1, 3.0), (2, 3.0), (4, 3.0), (3, 2.0)]
+    assert [i for i, _ in top_k_scores(np.zeros(4), 3)] == [0, 1, 2]
+
+
+def test_top_k_bounds():
+    scores = np.array([0.5, 2.0])
+    assert top_k_scores(scores, 10) == [(1, 2.0), (0, 0.5)]
+    assert top_k_scores(scores, 0) == []
+    assert top_k_scores(np.zeros(0), 3) == []
+
+
+def test_top_k_matches_full_sort():
+    rng = np.random.default_rng(3)
+    scores = rng.integers(0, 5, size=200).astype(float)
+    for k in (1, 5, 17, 200):
+        expected = sorted(range(len(scores)), key=lambda i: (-scores[i], i))[:k]
+        assert [i for i, _ in top_k_scores(scores, k)] == expected
@@ -0,0 +1,118 @@
+import time
+
+import pytest
+
+pytest.importorskip("streamlit")  # utils/__init__ pulls in the LLM client
+
+from utils import circuit_breaker  # noqa: E402
+from utils import rate_limiter  # noqa: E402
+from utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, order_by_health  # noqa: E402
+from utils.llm_client import LLMClient  # noqa: E402
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def breakers(monkeypatch):
+    """Fresh process-wide breaker registry."""
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+    return circuit_breaker._breakers
+
+
+def test_opens_at_failure_threshold(clock):
+    breaker = CircuitBreaker(min_calls=4, failure_threshold=0.5)
+    for _ in range(2):
+        breaker.record_success(0.1)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert not breaker.available()
+
+
+def test_half_open_admits_one_probe(clock):
+    breaker = CircuitBreaker(min_calls=1, open_seconds=30.0)
+    breaker.record_failure()
+    clock.now += 29.0
+    assert not breaker.allow()
+    clock.now += 1.0
+    assert breaker.available()
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    assert not breaker.available()
+    breaker.record_success(0.2)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker(min_calls=1, open_seconds=30.0)
+    breaker.record_failure()
+    clock.now += 30.0
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    clock.now += 10.0
+    assert not breaker.allow()
+
+
+def test_released_probe_can_be_retried(clock):
+    breaker = CircuitBreaker(min_calls=1, open_seconds=0.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_slow_calls_count_as_failures(clock):
+    breaker = CircuitBreaker(min_calls=2, slow_call_seconds=1.0)
+    breaker.record_success(5.0)
+    breaker.record_success(5.0)
+    assert breaker.state == OPEN
+
+
+def test_order_by_health(clock, breakers):
+    config = {}
+    for name, latency in (("slow", 2.0), ("fast", 0.5), ("flaky", 0.5)):
+        circuit_breaker.get_circuit_breaker(name, config).record_success(latency)
+    flaky = breakers["flaky"]
+    flaky.record_failure()
+    down = circuit_breaker.get_circuit_breaker("down", config)
+    for _ in range(5):
+        down.record_failure()
+    circuit_breaker.get_circuit_breaker("failing", config).record_failure()
+    providers = ["slow", "down", "failing", "flaky", "fast", "new"]
+    # Unmeasured first, then by latency inflated by errors; open circuits are dropped
+    assert order_by_health(providers, config) == ["new", "fast", "flaky", "slow", "failing"]
+
+
+class SlowLimiter:
+    """Limiter that spends time queueing before every call."""
+
+    def call(self, fn, estimated_tokens=0):
+        time.sleep(0.2)
+        return fn()
+
+
+def test_latency_excludes_limiter_waits(monkeypatch, breakers):
+    monkeypatch.setitem(rate_limiter._limiters, "cohere", SlowLimiter())
+    client = LLMClient(config={"response_cache": "off"})
+    monkeypatch.setattr(client, "_call_cohere", lambda prompt, system_prompt: "ok")
+    assert client._call_provider("cohere", "prompt", "", "auto") == "ok"
+    assert breakers["cohere"].latency < 0.1
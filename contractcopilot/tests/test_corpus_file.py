@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from retrieval import BM25Index, ClauseStore, clauses_fingerprint, open_corpus, tokenize, write_corpus
+from retrieval.corpus_file import MAGIC
+
+DOCUMENTS = [
+    ("msa.txt", "Liability is capped at fees paid. The Supplier indemnifies the Customer.",
+     [(0, 33), (34, 72)]),
+    ("dpa.txt", "Personal data breaches are notified within 72 hours. Données personnelles protégées.",
+     [(0, 52), (53, 84)]),
+    ("nda.txt", "Confidential information stays confidential for five years.", [(0, 60)]),
+]
+QUERIES = ["liability fees", "personal data breach", "données", "confidential", "unknown"]
+
+
+@pytest.fixture
+def store():
+    return ClauseStore.from_spans(DOCUMENTS)
+
+
+def test_round_trip(tmp_path, store):
+    path = str(tmp_path / "corpus.bin")
+    write_corpus(path, store)
+    with open_corpus(path) as corpus:
+        assert list(corpus.clauses) == list(store)
+        assert corpus.contract_names == ["msa.txt", "dpa.txt", "nda.txt"]
+        assert [corpus.clauses.contract_of(i) for i in range(len(store))] == \
+            [store.contract_of(i) for i in range(len(store))]
+        assert corpus.clauses.snippet(2, 10) == store.snippet(2, 10)
+
+
+def test_mapped_scores_match_bm25_index(tmp_path, store):
+    path = str(tmp_path / "corpus.bin")
+    write_corpus(path, store)
+    reference = BM25Index([tokenize(c) for c in store])
+    with open_corpus(path) as corpus:
+        for query in QUERIES:
+            tokens = tokenize(query)
+            np.testing.assert_allclose(corpus.index.get_scores(tokens), reference.get_scores(tokens), rtol=1e-6)
+            assert corpus.index.top_k(tokens, 3) == pytest.approx(reference.top_k(tokens, 3))
+        assert corpus.index.vocab.keys() == reference.vocab.keys()
+
+
+def test_plain_clause_list(tmp_path):
+    path = str(tmp_path / "corpus.bin")
+    write_corpus(path, ["one clause", "another clause"])
+    with open_corpus(path) as corpus:
+        assert list(corpus.clauses) == ["one clause", "another clause"]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not-a-corpus.bin"
+    path.write_bytes(b"x" * 64)
+    with pytest.raises(ValueError):
+        open_corpus(str(path))
+
+
+def test_rejects_other_versions(tmp_path, store):
+    path = tmp_path / "corpus.bin"
+    write_corpus(str(path), store)
+    data = bytearray(path.read_bytes())
+    assert data[:len(MAGIC)] == MAGIC
+    data[len(MAGIC)] += 1
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError):
+        open_corpus(str(path))
+
+
+def test_store_fingerprint_is_hashed_once(store):
+    key = clauses_fingerprint(store, "bm25")
+    assert key == clauses_fingerprint(list(store), "bm25")
+    assert store.fingerprints == {"bm25": key}
+    store.fingerprints["bm25"] = "memoized"
+    assert clauses_fingerprint(store, "bm25") == "memoized"
+    assert clauses_fingerprint(store[:2], "bm25") == clauses_fingerprint(list(store)[:2], "bm25")
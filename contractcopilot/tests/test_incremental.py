@@ -0,0 +1,66 @@
+import random
+
+import numpy as np
+
+from retrieval import BM25Index, IncrementalBM25Index, tokenize
+
+BASE = [
+    "The Supplier shall indemnify the Customer against third party claims.",
+    "Liability is limited to the fees paid in the prior twelve months.",
+    "Either party may terminate for convenience on thirty days notice.",
+    "Personal data breaches are notified within seventy two hours.",
+    "This Agreement is governed by the laws of England and Wales.",
+    "Confidential information must not be disclosed to third parties.",
+    "Fees are payable within thirty days of invoice.",
+    "The Customer may audit the Supplier once per year.",
+]
+QUERIES = ["liability limited fees", "data breach notified", "third party", "the of and", "thirty days", "absent"]
+
+
+def assert_matches_rebuild(index, clauses):
+    reference = BM25Index([tokenize(c) for c in clauses])
+    for query in QUERIES:
+        tokens = tokenize(query)
+        np.testing.assert_allclose(index.get_scores(tokens), reference.get_scores(tokens), rtol=1e-6, atol=1e-12)
+        assert [i for i, _ in index.top_k(tokens, 3)] == [i for i, _ in reference.top_k(tokens, 3)]
+
+
+def test_random_edits_match_full_rebuild():
+    rng = random.Random(11)
+    index = IncrementalBM25Index()
+    clauses = list(BASE)
+    index.update(clauses)
+    assert_matches_rebuild(index, clauses)
+    for _ in range(150):
+        clauses = list(clauses)
+        op = rng.random()
+        if op < 0.3:
+            clauses[rng.randrange(len(clauses))] += " amended liability cap"
+        elif op < 0.5:
+            clauses.insert(rng.randrange(len(clauses) + 1), rng.choice(BASE) + " revised")
+        elif op < 0.65 and len(clauses) > 3:
+            del clauses[rng.randrange(len(clauses))]
+        elif op < 0.8:
+            clauses.append(rng.choice(clauses))
+        else:
+            rng.shuffle(clauses)
+        index.update(clauses)
+        assert_matches_rebuild(index, clauses)
+
+
+def test_update_touches_only_changed_clauses():
+    index = IncrementalBM25Index()
+    assert index.update(BASE) == {"added": len(BASE), "removed": 0, "reused": 0}
+    edited = list(BASE)
+    edited[2] = "Either party may terminate for cause."
+    edited.insert(0, "A new definitions clause.")
+    assert index.update(edited) == {"added": 2, "removed": 1, "reused": len(BASE) - 1}
+    assert index.update(list(reversed(edited))) == {"added": 0, "removed": 0, "reused": len(edited)}
+
+
+def test_emptied_index():
+    index = IncrementalBM25Index()
+    index.update(BASE)
+    index.update([])
+    assert index.postings == {}
+    assert index.top_k(tokenize("liability"), 3) == []
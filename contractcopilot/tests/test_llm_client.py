@@ -0,0 +1,71 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("streamlit")  # utils/__init__ pulls in the LLM client
+
+from utils import circuit_breaker  # noqa: E402
+from utils.llm_client import LLMClient  # noqa: E402
+
+
+class FakeStream:
+    """SDK-style stream of chat completion chunks that records being closed."""
+
+    def __init__(self, texts):
+        self.chunks = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=t))]) for t in texts]
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def breakers(monkeypatch):
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+
+
+def fake_openai(stream):
+    completions = SimpleNamespace(create=lambda **kwargs: stream)
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+
+def test_stream_closes_sdk_stream_when_consumer_stops():
+    client = LLMClient(config={"response_cache": "off"})
+    stream = FakeStream(["Liability ", "is ", "capped."])
+    client.clients = {"openai": fake_openai(stream)}
+    deltas = client.generate_response_stream("prompt")
+    assert next(deltas) == "Liability "
+    deltas.close()
+    assert stream.closed
+
+
+def test_stream_closes_sdk_stream_when_exhausted():
+    client = LLMClient(config={"response_cache": "off"})
+    stream = FakeStream(["Liability ", None, "is capped."])
+    client.clients = {"openai": fake_openai(stream)}
+    assert "".join(client.generate_response_stream("prompt")) == "Liability is capped."
+    assert stream.closed
+
+
+def test_hedged_config_streams_the_hedged_answer(monkeypatch):
+    client = LLMClient(config={"response_cache": "off", "hedge_after_seconds": 2})
+    client.clients = {"openai": fake_openai(FakeStream(["unused"]))}
+    monkeypatch.setattr(client, "generate_response", lambda prompt, system_prompt, model: f"hedged: {prompt}")
+    assert list(client.generate_response_stream("prompt")) == ["hedged: prompt"]
+
+
+def test_async_clients_are_built_per_event_loop():
+    client = LLMClient(config={"response_cache": "off"})
+    client.async_client_factories = {"openai": object}
+
+    async def clients():
+        return client._async_client("openai"), client._async_client("openai")
+
+    first, again = asyncio.run(clients())
+    assert first is again
+    second, _ = asyncio.run(clients())
+    assert second is not first
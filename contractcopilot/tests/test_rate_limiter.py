@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+# The utils package imports streamlit on load
+pytest.importorskip("streamlit")
+
+from utils.rate_limiter import ConcurrencySlots, ProviderLimiter, _retry_status  # noqa: E402
+
+
+def test_async_waiters_are_served_in_arrival_order():
+    async def scenario():
+        slots = ConcurrencySlots(1)
+        await slots.aacquire()
+        order = []
+
+        async def worker(i):
+            await slots.aacquire()
+            order.append(i)
+            await asyncio.sleep(0)
+            slots.release()
+
+        tasks = [asyncio.create_task(worker(i)) for i in range(10)]
+        await asyncio.sleep(0.01)
+        slots.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == list(range(10))
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def scenario():
+        slots = ConcurrencySlots(1)
+        await slots.aacquire()
+        waiter = asyncio.create_task(slots.aacquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        slots.release()
+        await asyncio.wait_for(slots.aacquire(), 1)
+
+    asyncio.run(scenario())
+
+
+def test_stream_holds_slot_until_closed():
+    limiter = ProviderLimiter(max_concurrency=1)
+    stream = limiter.stream(lambda: iter(["a", "b"]))
+    assert next(stream) == "a"
+    results = []
+    caller = threading.Thread(target=lambda: results.append(limiter.call(lambda: "done")))
+    caller.start()
+    time.sleep(0.05)
+    assert results == []  # blocked behind the open stream
+    stream.close()
+    caller.join(1)
+    assert results == ["done"]
+
+
+def test_retry_status_comes_from_status_or_error_class():
+    class StatusError(Exception):
+        status_code = 503
+
+    class RateLimitError(Exception):
+        pass
+
+    class SubclassedRateLimit(RateLimitError):
+        pass
+
+    assert _retry_status(StatusError("unavailable")) == 503
+    assert _retry_status(RateLimitError("slow down")) == 429
+    assert _retry_status(SubclassedRateLimit("slow down")) == 429
+    # Digits or wording in a message are not a status
+    assert _retry_status(ValueError("prompt is 4291 tokens, over the 429 limit")) is None
+    assert _retry_status(ValueError("rate limit field missing from request 429")) is None
+
+
+def test_non_retryable_error_is_raised_without_retrying():
+    limiter = ProviderLimiter(max_retries=3, backoff_base=0.001)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise ValueError("request id 4290429 failed")
+
+    with pytest.raises(ValueError):
+        limiter.call(fn)
+    assert len(calls) == 1
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from segmenter import ClauseSpan, iter_clause_spans, iter_segments, segment_clauses
+
+SAMPLES = [
+    "## Parties\n\nThis Agreement is made between Acme and Beta.\n\n"
+    "SECTION 1. Definitions\n\"Data\" means personal data.\n1.1. Affiliates are included.\n"
+    "1.2. Services are listed in Schedule A.\n\n"
+    "ARTICLE 2. Liability\nLiability is capped.\r\n\r\n2.1. Exclusions apply.\n   3. Term\nOne year.\n\n\n",
+    # DOCX/PDF style: lines separated by a single newline, no boundaries for a long stretch
+    "\n".join(f"Paragraph {i} of the agreement sets out obligation number {i}." for i in range(60)),
+    "section 12.   Lowercase marker\nbody\n\n\n\n## Heading only\n\n4. Numbered\n5.not a marker\n6. Marker",
+    "   \n\n  leading whitespace\n\n\n",
+    "",
+]
+
+
+def chunked(text, rng, max_size):
+    pos = 0
+    while pos < len(text):
+        size = rng.randint(0, max_size)
+        yield text[pos:pos + size]
+        pos += size
+
+
+def as_tuples(pairs):
+    return [(span.start, span.end, span.section, span.heading, text) for span, text in pairs]
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_streamed_equals_one_shot_for_any_chunking(text):
+    expected = as_tuples(iter_segments([text]))
+    rng = random.Random(len(text))
+    for trial in range(300):
+        chunks = list(chunked(text, rng, 1 + trial % 40))
+        assert as_tuples(iter_segments(chunks)) == expected, chunks
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_streamed_spans_and_texts_match_source(text):
+    chunks = list(chunked(text, random.Random(7), 13))
+    assert list(iter_clause_spans(chunks)) == segment_clauses(text)
+    assert [clause for _, clause in iter_segments(chunks)] == [span.text(text) for span in segment_clauses(text)]
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_single_characters(text):
+    assert as_tuples(iter_segments(list(text))) == as_tuples(iter_segments([text]))
+
+
+def test_spans_index_source_text():
+    text = SAMPLES[0]
+    spans = segment_clauses(text)
+    assert [span.text(text) for span in spans][:2] == [
+        "This Agreement is made between Acme and Beta.",
+        "SECTION 1. Definitions\n\"Data\" means personal data.",
+    ]
+    assert spans[0] == ClauseSpan(spans[0].start, spans[0].end, None, "Parties")
+    assert spans[1].section == "1" and spans[1].heading == "Definitions"
+    assert spans[2].section == "1.1" and spans[2].heading == "Definitions"
+    assert spans[4].section == "2" and spans[4].heading == "Liability"
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+pytest.importorskip("streamlit")  # utils/__init__ pulls in the LLM client
+
+from utils.structured_output import (  # noqa: E402
+    RISK_SCHEMA,
+    StructuredOutputError,
+    parse_json_tolerant,
+    parse_structured,
+    validate,
+)
+
+RISK = {
+    "risk_level": "High",
+    "confidence": "85%",
+    "explanation": "Uncapped liability.",
+    "key_risks": "unlimited damages",
+    "recommendations": ["Add a cap"],
+    "clause_type": "liability",
+}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1, "b": [1, 2', {"a": 1, "b": [1, 2]}),
+    ('{"a": "cut off mid-str', {"a": "cut off mid-str"}),
+    ('{"a": {"b": [true, ', {"a": {"b": [True]}}),
+    ('{"a": 1, "b":', {"a": 1}),
+])
+def test_truncated_objects_are_closed(text, expected):
+    assert parse_json_tolerant(text) == expected
+
+
+def test_truncated_array():
+    assert parse_json_tolerant('[{"a": 1}, {"b": 2', expect=list) == [{"a": 1}, {"b": 2}]
+
+
+@pytest.mark.parametrize("text", ['{"a": 1, "dangling"', '{"a": 1, "dangl'])
+def test_dangling_key_is_dropped(text):
+    assert parse_json_tolerant(text) == {"a": 1}
+
+
+@pytest.mark.parametrize("text", [
+    '```json\n{"a": 1, "b": [2,],}\n```',
+    'Here is the analysis:\n{"a": 1, "b": [2]}\nLet me know if you need more.',
+    'Sure! ```\n{"a": 1, "b": [2]\n```',
+])
+def test_fenced_and_prose_wrapped_output(text):
+    assert parse_json_tolerant(text) == {"a": 1, "b": [2]}
+
+
+def test_trailing_commas_inside_strings_are_kept():
+    text = '{"note": "limits: a,}  b,]", "items": [1, 2,], "extra": ",}",}'
+    assert parse_json_tolerant(text) == {"note": "limits: a,}  b,]", "items": [1, 2], "extra": ",}"}
+
+
+def test_no_json_raises():
+    with pytest.raises(StructuredOutputError):
+        parse_json_tolerant("I cannot analyze this clause.")
+
+
+def test_enum_and_percentage_coercion():
+    result = parse_structured(json.dumps(RISK), RISK_SCHEMA)
+    assert result["risk_level"] == "high"
+    assert result["confidence"] == 85
+    assert result["key_risks"] == ["unlimited damages"]
+
+
+def test_errors_are_aggregated():
+    data = dict(RISK, risk_level="severe", confidence="very")
+    del data["explanation"]
+    with pytest.raises(StructuredOutputError) as excinfo:
+        validate(data, RISK_SCHEMA)
+    message = str(excinfo.value)
+    assert "risk_level: expected one of high, medium, low" in message
+    assert "confidence: expected a number" in message
+    assert "explanation: missing" in message
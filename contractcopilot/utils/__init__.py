@@ -4,12 +4,17 @@ ContractCopilot Utilities
 Core utilities for the contract analysis application:
 - llm_client: Multi-provider LLM integration
 - config: Configuration management
+- response_cache: LLM response caches (in-memory LRU/TTL, SQLite)
 """
 
-from .llm_client import LLMClient
+from .llm_client import LLMClient, get_shared_llm_client
 from .config import load_config
+from .response_cache import MemoryResponseCache, SQLiteResponseCache
 
 __all__ = [
     "LLMClient",
-    "load_config"
+    "get_shared_llm_client",
+    "load_config",
+    "MemoryResponseCache",
+    "SQLiteResponseCache"
 ] 
\ No newline at end of file
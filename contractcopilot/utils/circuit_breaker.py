@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker driven by a rolling window of recent calls.
+
+    Calls that fail, or take longer than ``slow_call_seconds``, count against the
+    provider. When their share of the window reaches ``failure_threshold`` the
+    circuit opens and the provider is skipped; after ``open_seconds`` a single
+    probe call is let through (half-open) and its outcome closes or re-opens it.
+    """
+
+    def __init__(self, window: int = 20, min_calls: int = 5, failure_threshold: float = 0.5,
+                 open_seconds: float = 30.0, slow_call_seconds: Optional[float] = None,
+                 latency_alpha: float = 0.3):
+        self.min_calls = min_calls
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self.latency_alpha = latency_alpha
+        self.state = CLOSED
+        self.latency: Optional[float] = None  # EWMA of successful call latency
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        """Whether ``allow`` would currently admit a call (does not claim the probe)."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at < self.open_seconds:
+                return False
+            return not self._probe_in_flight
+
+    def allow(self) -> bool:
+        """Whether a call may be sent now (claims the probe slot when half-open)."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            self.latency = latency if self.latency is None else (
+                self.latency_alpha * latency + (1 - self.latency_alpha) * self.latency
+            )
+            slow = self.slow_call_seconds is not None and latency > self.slow_call_seconds
+            self._record(not slow)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._record(False)
+
+    def release(self) -> None:
+        """Give back a half-open probe slot when the call was cancelled without an outcome."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return 1.0 - sum(self._outcomes) / len(self._outcomes)
+
+    def health_score(self) -> float:
+        """Lower is better: smoothed latency inflated by the recent error rate."""
+        if self.latency is None:
+            # Unmeasured providers go first; ones that have only ever failed go last
+            return float("inf") if self._outcomes else 0.0
+        return self.latency * (1.0 + 4.0 * self.error_rate())
+
+    def _record(self, ok: bool) -> None:
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = False
+            if ok:
+                self.state = CLOSED
+                self._outcomes.clear()
+            else:
+                self._trip()
+            self._outcomes.append(ok)
+            return
+        self._outcomes.append(ok)
+        if len(self._outcomes) >= self.min_calls and self.error_rate() >= self.failure_threshold:
+            self._trip()
+
+    def _trip(self) -> None:
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(provider: str, config: Dict[str, Any]) -> CircuitBreaker:
+    """Process-wide breaker for ``provider``, shared by every session."""
+    with _breakers_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            slow = config.get('llm_slow_call_seconds')
+            breaker = CircuitBreaker(
+                open_seconds=float(config.get('llm_circuit_open_seconds') or 30.0),
+                slow_call_seconds=float(slow) if slow else None
+            )
+            _breakers[provider] = breaker
+        return breaker
+
+
+def order_by_health(providers: List[str], config: Dict[str, Any]) -> List[str]:
+    """
+    Providers whose circuit admits a call, fastest-healthy first. Providers with
+    no latency data yet sort first so each gets measured; ties keep priority order.
+    """
+    available = [p for p in providers if get_circuit_breaker(p, config).available()]
+    return sorted(available, key=lambda p: get_circuit_breaker(p, config).health_score())
@@ -2,6 +2,15 @@ import streamlit as st
 import os
 from typing import Dict, Any
 
+# Compliance frameworks the analyses know about: code -> full name
+COMPLIANCE_FRAMEWORKS = {
+    "GDPR": "General Data Protection Regulation",
+    "CCPA": "California Consumer Privacy Act",
+    "SOX": "Sarbanes-Oxley Act",
+    "HIPAA": "Health Insurance Portability and Accountability Act",
+    "PCI-DSS": "Payment Card Industry Data Security Standard"
+}
+
 def load_config() -> Dict[str, Any]:
     """
     Load configuration from Streamlit secrets or environment variables.
@@ -48,4 +57,44 @@ def load_config() -> Dict[str, Any]:
     
     config['demo_mode'] = False
     
-    return config 
\ No newline at end of file
+    # Optional hedging: seconds to wait on a provider before racing the next one
+    hedge_after = _get_setting('llm_hedge_after_seconds', 'LLM_HEDGE_AFTER_SECONDS')
+    config['hedge_after_seconds'] = float(hedge_after) if hedge_after else None
+    
+    # LLM response cache: in-memory by default, SQLite when a path is given, 'off' to disable
+    config['response_cache'] = _get_setting('llm_response_cache', 'LLM_RESPONSE_CACHE') or 'memory'
+    config['response_cache_path'] = _get_setting('llm_response_cache_path', 'LLM_RESPONSE_CACHE_PATH')
+    cache_ttl = _get_setting('llm_response_cache_ttl_seconds', 'LLM_RESPONSE_CACHE_TTL_SECONDS')
+    config['response_cache_ttl_seconds'] = float(cache_ttl) if cache_ttl else None
+    
+    # Shared HTTP connection pool sizing (per provider, shared by all sessions)
+    for key in ('http_max_connections', 'http_max_keepalive_connections', 'http_keepalive_expiry_seconds'):
+        config[key] = _get_setting(key, key.upper())
+    
+    # Per-provider quotas (requests/min, tokens/min, calls in flight) shared by all sessions
+    for provider in ('openai', 'cohere', 'groq', 'gemini'):
+        for limit in ('rpm', 'tpm', 'max_concurrency'):
+            key = f'{provider}_{limit}'
+            config[key] = _get_setting(key, key.upper())
+    config['llm_max_retries'] = _get_setting('llm_max_retries', 'LLM_MAX_RETRIES')
+    
+    # Circuit breaker: how long a failing provider is skipped, and what counts as too slow
+    config['llm_circuit_open_seconds'] = _get_setting('llm_circuit_open_seconds', 'LLM_CIRCUIT_OPEN_SECONDS')
+    config['llm_slow_call_seconds'] = _get_setting('llm_slow_call_seconds', 'LLM_SLOW_CALL_SECONDS')
+    
+    # Provider JSON mode for risk/metadata/compliance analyses ('on' default, 'off' to disable)
+    config['llm_json_mode'] = _get_setting('llm_json_mode', 'LLM_JSON_MODE')
+    
+    return config
+
+def _get_setting(secret_name: str, env_name: str):
+    """Read an optional setting from Streamlit secrets, falling back to the environment."""
+    value = None
+    try:
+        if hasattr(st, 'secrets'):
+            value = st.secrets.get(secret_name)
+    except Exception:
+        pass
+    if value is None:
+        value = os.getenv(env_name)
+    return value
@@ -1,35 +1,84 @@
 import streamlit as st
+import asyncio
+import hashlib
 import json
+import threading
 import time
-from typing import Dict, Any, List, Optional
-import google.generativeai as genai
-import openai
-import cohere
+import weakref
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Any, Iterator, List, Optional
+# Provider SDKs are imported in setup_clients, only for providers with an API key:
+# each one costs noticeable cold-start time that keyless providers shouldn't pay
+
+from .circuit_breaker import CircuitOpenError, get_circuit_breaker, order_by_health
+from .rate_limiter import get_provider_limiter
+from .response_cache import ResponseCache, build_response_cache, response_cache_key
+from .structured_output import (
+    COMPLIANCE_SCHEMA, METADATA_SCHEMA, RISK_SCHEMA, SECTION_SCHEMAS, Schema, StructuredOutputError,
+    full_analysis_schema, parse_json_tolerant, parse_structured, repair_prompts, validate
+)
 
 class LLMClient:
-    def __init__(self):
-        self.config = st.session_state.get('config', {})
+    # Providers in priority order
+    CLIENT_ORDER = ['openai', 'cohere', 'groq', 'gemini']
+    # Default model per provider ('auto' resolves to these)
+    PROVIDER_MODELS = {
+        'openai': 'gpt-4',
+        'cohere': 'default',
+        'groq': 'llama3-8b-8192',
+        'gemini': 'gemini-2.5-pro'
+    }
+    MAX_TOKENS = 1000
+    # OpenAI models that predate response_format={"type": "json_object"}
+    OPENAI_NO_JSON_MODE = {'gpt-4', 'gpt-4-0314', 'gpt-4-0613', 'gpt-4-32k', 'gpt-4-32k-0613', 'gpt-3.5-turbo-0613'}
+    TEMPERATURE = 0.3  # Lower temperature for more consistent legal analysis
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, response_cache: Optional[ResponseCache] = None):
+        # Streamlit sessions keep config in session_state; headless callers pass it in
+        self.config = config if config is not None else st.session_state.get('config', {})
+        # Identical (provider, model, prompts, params) requests are served from here
+        self.response_cache = response_cache if response_cache is not None else build_response_cache(self.config)
+        # When set, a provider that has not answered within this many seconds is
+        # raced against the next one instead of blocking the whole request
+        self.hedge_after_seconds = self.config.get('hedge_after_seconds')
+        # Ask providers that support it for bare JSON on structured analyses
+        self.json_mode = str(self.config.get('llm_json_mode') or 'on').lower() not in ('off', 'false', '0')
         self.setup_clients()
     
     def setup_clients(self):
         """Initialize LLM clients based on available API keys."""
         self.clients = {}
+        # Set when the installed google-generativeai accepts response_mime_type
+        self.gemini_json_mode = False
+        # Factories for the native async SDK clients backing the agenerate_response / a* API.
+        # Async connection pools belong to the event loop that opened them, so clients are
+        # built per running loop (see ``_async_client``) rather than once here
+        self.async_client_factories: Dict[str, Callable[[], Any]] = {}
+        self._loop_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._loop_clients_lock = threading.Lock()
         
         # Setup OpenAI (Priority 1)
         if self.config.get('openai_api_key'):
             try:
                 # No need to set global API key in new format
                 # Just verify the key works by creating a client
-                from openai import OpenAI
-                test_client = OpenAI(api_key=self.config['openai_api_key'])
+                from openai import OpenAI, AsyncOpenAI
+                test_client = OpenAI(api_key=self.config['openai_api_key'], http_client=self._http_client())
                 self.clients['openai'] = test_client
+                self.async_client_factories['openai'] = lambda: AsyncOpenAI(
+                    api_key=self.config['openai_api_key'], http_client=self._http_client(asynchronous=True)
+                )
             except Exception as e:
                 pass
         
         # Setup Cohere (Priority 2)
         if self.config.get('cohere_api_key'):
             try:
+                import cohere
                 self.clients['cohere'] = cohere.Client(self.config['cohere_api_key'])
+                self.async_client_factories['cohere'] = lambda: cohere.AsyncClient(self.config['cohere_api_key'])
             except Exception as e:
                 pass
         
@@ -37,7 +86,10 @@ class LLMClient:
         if self.config.get('groq_api_key'):
             try:
                 import groq
-                self.clients['groq'] = groq.Groq(api_key=self.config['groq_api_key'])
+                self.clients['groq'] = groq.Groq(api_key=self.config['groq_api_key'], http_client=self._http_client())
+                self.async_client_factories['groq'] = lambda: groq.AsyncGroq(
+                    api_key=self.config['groq_api_key'], http_client=self._http_client(asynchronous=True)
+                )
             except ImportError:
                 pass
             except Exception as e:
@@ -46,8 +98,11 @@ class LLMClient:
         # Setup Gemini (Priority 4)
         if self.config.get('gemini_api_key'):
             try:
+                import google.generativeai as genai
                 genai.configure(api_key=self.config['gemini_api_key'])
                 self.clients['gemini'] = genai
+                self.async_client_factories['gemini'] = lambda: genai
+                self.gemini_json_mode = _gemini_supports_json_mode(genai)
             except Exception as e:
                 pass
         
@@ -57,10 +112,808 @@ class LLMClient:
         else:
             pass  # Don't show demo mode message here
     
+    def _http_client(self, asynchronous: bool = False):
+        """
+        Keep-alive HTTP connection pool for one provider, sized from config so a
+        shared client can serve many sessions without a TLS handshake per request.
+        """
+        import httpx
+        limits = httpx.Limits(
+            max_connections=int(self.config.get('http_max_connections') or 100),
+            max_keepalive_connections=int(self.config.get('http_max_keepalive_connections') or 20),
+            keepalive_expiry=float(self.config.get('http_keepalive_expiry_seconds') or 30.0)
+        )
+        return httpx.AsyncClient(limits=limits) if asynchronous else httpx.Client(limits=limits)
+    
+    def _async_client(self, client_name: str) -> Any:
+        """
+        The async SDK client for ``client_name`` on the running event loop. Each
+        loop gets its own clients (and connection pools), so repeated
+        ``asyncio.run`` calls never reuse connections of a closed loop; a loop's
+        clients are dropped when the loop is garbage collected.
+        """
+        loop = asyncio.get_running_loop()
+        with self._loop_clients_lock:
+            clients = self._loop_clients.get(loop)
+            if clients is None:
+                clients = self._loop_clients[loop] = {}
+            client = clients.get(client_name)
+            if client is None:
+                client = clients[client_name] = self.async_client_factories[client_name]()
+            return client
+    
     def analyze_clause_risk(self, clause_text: str) -> Dict[str, Any]:
         """
         Analyze clause risk using LLM with structured output.
         """
+        user_prompt, system_prompt = self._risk_prompts(clause_text)
+        return self._structured(user_prompt, system_prompt, RISK_SCHEMA)
+    
+    def extract_metadata(self, clause_text: str) -> Dict[str, Any]:
+        """
+        Extract metadata from clause using LLM.
+        """
+        user_prompt, system_prompt = self._metadata_prompts(clause_text)
+        return self._structured(user_prompt, system_prompt, METADATA_SCHEMA)
+    
+    def analyze_compliance(self, clause_text: str, frameworks: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Analyze clause compliance against regulatory frameworks using LLM.
+        """
+        user_prompt, system_prompt = self._compliance_prompts(clause_text, frameworks)
+        return self._structured(user_prompt, system_prompt, COMPLIANCE_SCHEMA)
+    
+    def analyze_clause_full(self, clause_text: str, frameworks: Optional[Dict[str, str]] = None,
+                            sections: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Risk, metadata and compliance analysis of one clause in a single LLM call.
+        
+        Returns ``{"risk": ..., "metadata": ..., "compliance": ...}`` limited to
+        ``sections`` (default: all three; compliance needs ``frameworks``). Each
+        value has the same shape as the matching single-analysis method returns.
+        """
+        sections = self._full_sections(sections, frameworks)
+        user_prompt, system_prompt = self._full_prompts(clause_text, sections, frameworks or {})
+        return self._structured(user_prompt, system_prompt, full_analysis_schema(sections))
+    
+    def analyze_clause_risk_batch(self, clauses: List[str], max_concurrency: int = 4,
+                                  clauses_per_prompt: int = 5) -> List[Dict[str, Any]]:
+        """
+        Analyze many clauses for risk.
+        
+        Clauses are packed ``clauses_per_prompt`` at a time into one prompt that
+        returns a JSON array keyed by clause id, and packs run concurrently on up
+        to ``max_concurrency`` threads. Results come back in input order. A clause
+        missing from its pack's response is retried on its own; a clause that
+        still fails gets ``{"error": ...}`` instead of failing the whole batch.
+        
+        Analyses are also cached per clause, so re-analyzing an edited contract
+        only sends the clauses that changed (a pack prompt changes whenever any
+        clause in it does, so the prompt cache alone would miss).
+        """
+        if not clauses:
+            return []
+        results: List[Optional[Dict[str, Any]]] = [self._cached_clause_result('risk', c) for c in clauses]
+        pending = [i for i, result in enumerate(results) if result is None]
+        size = max(1, clauses_per_prompt)
+        packs = [pending[start:start + size] for start in range(0, len(pending), size)]
+        
+        def run_pack(ids: List[int]) -> None:
+            analyses = {}
+            if len(ids) > 1:
+                try:
+                    analyses = self._analyze_risk_pack([clauses[i] for i in ids])
+                except Exception:
+                    analyses = {}
+            for pack_pos, clause_idx in enumerate(ids):
+                if pack_pos in analyses:
+                    results[clause_idx] = analyses[pack_pos]
+                else:
+                    try:
+                        results[clause_idx] = self.analyze_clause_risk(clauses[clause_idx])
+                    except Exception as e:
+                        results[clause_idx] = {"error": str(e)}
+                        continue
+                self._store_clause_result('risk', clauses[clause_idx], results[clause_idx])
+        
+        if not packs:
+            return results
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="llm-batch") as executor:
+            list(executor.map(run_pack, packs))
+        return results
+    
+    def _analyze_risk_pack(self, pack: List[str]) -> Dict[int, Dict[str, Any]]:
+        """One LLM call for several clauses; returns analyses by position in ``pack``."""
+        user_prompt, system_prompt = self._risk_batch_prompts(pack)
+        response = self.generate_response(user_prompt, system_prompt)
+        try:
+            items = parse_json_tolerant(response, expect=list)
+        except StructuredOutputError:
+            self.invalidate_cached_response(user_prompt, system_prompt)
+            raise
+        analyses = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            try:
+                clause_id = int(item.pop('clause_id'))
+            except (KeyError, TypeError, ValueError):
+                continue
+            # Clause ids in the prompt are 1-based
+            if not 1 <= clause_id <= len(pack):
+                continue
+            try:
+                analyses[clause_id - 1] = validate(item, RISK_SCHEMA)
+            except StructuredOutputError:
+                continue
+        return analyses
+    
+    # --- Async API ---
+    async def aanalyze_clause_risk(self, clause_text: str) -> Dict[str, Any]:
+        """Async counterpart of ``analyze_clause_risk``."""
+        user_prompt, system_prompt = self._risk_prompts(clause_text)
+        return await self._astructured(user_prompt, system_prompt, RISK_SCHEMA)
+    
+    async def aextract_metadata(self, clause_text: str) -> Dict[str, Any]:
+        """Async counterpart of ``extract_metadata``."""
+        user_prompt, system_prompt = self._metadata_prompts(clause_text)
+        return await self._astructured(user_prompt, system_prompt, METADATA_SCHEMA)
+    
+    async def aanalyze_compliance(self, clause_text: str, frameworks: Dict[str, str]) -> Dict[str, Any]:
+        """Async counterpart of ``analyze_compliance``."""
+        user_prompt, system_prompt = self._compliance_prompts(clause_text, frameworks)
+        return await self._astructured(user_prompt, system_prompt, COMPLIANCE_SCHEMA)
+    
+    async def aanalyze_clause_full(self, clause_text: str, frameworks: Optional[Dict[str, str]] = None,
+                                   sections: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Async counterpart of ``analyze_clause_full``."""
+        sections = self._full_sections(sections, frameworks)
+        user_prompt, system_prompt = self._full_prompts(clause_text, sections, frameworks or {})
+        return await self._astructured(user_prompt, system_prompt, full_analysis_schema(sections))
+    
+    def generate_response(self, prompt: str, system_prompt: str = "", model: str = "auto",
+                          json_mode: bool = False) -> str:
+        """
+        Generate response using available LLM clients. Priority order is:
+        1. OpenAI
+        2. Cohere
+        3. Groq
+        4. Gemini
+        
+        Providers with an open circuit breaker are skipped, and the rest are
+        tried fastest-healthy first (ties keep the priority order).
+        
+        With ``hedge_after_seconds`` configured, slow providers are hedged
+        against the next one in parallel (see ``_generate_hedged``).
+        """
+        if not self.clients:
+            raise Exception("No LLM clients available. Please add an API key.")
+        
+        providers = [name for name in self.CLIENT_ORDER if name in self.clients]
+        cached = self._cached_response(providers, prompt, system_prompt, model, json_mode)
+        if cached is not None:
+            return cached
+        providers = self._healthy_providers(providers)
+        if self.hedge_after_seconds:
+            return self._generate_hedged(providers, prompt, system_prompt, model, json_mode)
+        
+        # Try healthy clients, fastest first
+        for client_name in providers:
+            try:
+                return self._call_provider(client_name, prompt, system_prompt, model, json_mode)
+            except CircuitOpenError:
+                continue
+            except Exception as e:
+                st.warning(f"Error with {client_name}: {e}")
+                continue
+        
+        raise Exception("All LLM clients failed. Please check your API keys.")
+    
+    def _generate_hedged(self, providers: List[str], prompt: str, system_prompt: str, model: str,
+                         json_mode: bool = False) -> str:
+        """
+        Hedged dispatch: start the primary provider and, whenever no response has
+        arrived within ``hedge_after_seconds`` (or the running call fails), start the
+        next provider in parallel. The first successful response wins; calls still
+        queued are cancelled and calls already in flight are abandoned.
+        """
+        executor = ThreadPoolExecutor(max_workers=len(providers), thread_name_prefix="llm-hedge")
+        pending = {}
+        errors = []
+        remaining = list(providers)
+        
+        def launch_next():
+            client_name = remaining.pop(0)
+            future = executor.submit(self._call_provider, client_name, prompt, system_prompt, model, json_mode)
+            pending[future] = client_name
+        
+        try:
+            launch_next()
+            while pending:
+                timeout = self.hedge_after_seconds if remaining else None
+                done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    launch_next()
+                    continue
+                for future in done:
+                    client_name = pending.pop(future)
+                    try:
+                        return future.result()
+                    except Exception as e:
+                        errors.append((client_name, e))
+                        if remaining:
+                            launch_next()
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+            # Streamlit calls are only valid on the script thread, so report here
+            for client_name, e in errors:
+                if not isinstance(e, CircuitOpenError):
+                    st.warning(f"Error with {client_name}: {e}")
+        
+        raise Exception("All LLM clients failed. Please check your API keys.")
+    
+    def _call_provider(self, client_name: str, prompt: str, system_prompt: str, model: str,
+                       json_mode: bool = False) -> str:
+        """Dispatch a single call to the named provider and cache the response."""
+        if client_name == 'openai':
+            call = lambda: self._call_openai(prompt, system_prompt, model, json_mode)
+        elif client_name == 'cohere':
+            call = lambda: self._call_cohere(prompt, system_prompt)
+        elif client_name == 'groq':
+            call = lambda: self._call_groq(prompt, system_prompt, json_mode)
+        elif client_name == 'gemini':
+            call = lambda: self._call_gemini(prompt, system_prompt, json_mode)
+        else:
+            raise Exception(f"Unknown LLM provider: {client_name}")
+        breaker = get_circuit_breaker(client_name, self.config)
+        if not breaker.allow():
+            raise CircuitOpenError(f"{client_name} circuit is open")
+        limiter = get_provider_limiter(client_name, self.config)
+        started = 0.0
+
+        def attempt():
+            # Latency covers the provider attempt only, not rate-limit waits or retry backoff
+            nonlocal started
+            started = time.perf_counter()
+            return call()
+
+        try:
+            response = limiter.call(attempt, self._estimate_tokens(prompt, system_prompt))
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success(time.perf_counter() - started)
+        self._store_response(client_name, prompt, system_prompt, model, response, json_mode)
+        return response
+    
+    def generate_response_stream(self, prompt: str, system_prompt: str = "", model: str = "auto") -> Iterator[str]:
+        """
+        Streaming variant of ``generate_response``: yields text deltas as the
+        provider produces them. Providers are tried in the same health order; a
+        provider that fails before its first token falls through to the next one,
+        but a failure mid-stream is raised since output has already been shown.
+        
+        Streams are not hedged: with ``hedge_after_seconds`` configured the hedged
+        ``generate_response`` is used instead and its answer yielded as one chunk.
+        """
+        if not self.clients:
+            raise Exception("No LLM clients available. Please add an API key.")
+        
+        providers = [name for name in self.CLIENT_ORDER if name in self.clients]
+        cached = self._cached_response(providers, prompt, system_prompt, model)
+        if cached is not None:
+            yield cached
+            return
+        if self.hedge_after_seconds:
+            yield self.generate_response(prompt, system_prompt, model)
+            return
+        
+        for client_name in self._healthy_providers(providers):
+            breaker = get_circuit_breaker(client_name, self.config)
+            if not breaker.allow():
+                continue
+            limiter = get_provider_limiter(client_name, self.config)
+            started = 0.0
+
+            def open_stream():
+                # Timed from the attempt that opened the stream, not from rate-limit waits
+                nonlocal started
+                started = time.perf_counter()
+                return self._open_stream(client_name, prompt, system_prompt, model)
+
+            parts = []
+            # The provider's concurrency slot is held until the stream ends or is closed
+            stream = limiter.stream(open_stream, self._estimate_tokens(prompt, system_prompt))
+            try:
+                for delta in stream:
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+            except GeneratorExit:
+                # Consumer stopped reading; no verdict on the provider
+                breaker.release()
+                raise
+            except Exception as e:
+                breaker.record_failure()
+                if parts:
+                    raise
+                st.warning(f"Error with {client_name}: {e}")
+                continue
+            finally:
+                stream.close()
+            breaker.record_success(time.perf_counter() - started)
+            self._store_response(client_name, prompt, system_prompt, model, "".join(parts))
+            return
+        
+        raise Exception("All LLM clients failed. Please check your API keys.")
+    
+    def _open_stream(self, client_name: str, prompt: str, system_prompt: str, model: str) -> Iterator[str]:
+        """Start a streaming completion and return an iterator of text deltas."""
+        if client_name in ('openai', 'groq'):
+            messages = []
+            if system_prompt:
+                messages.append({"role": "system", "content": system_prompt})
+            messages.append({"role": "user", "content": prompt})
+            stream = self.clients[client_name].chat.completions.create(
+                model=self._resolve_model(client_name, model),
+                messages=messages,
+                max_tokens=self.MAX_TOKENS,
+                temperature=self.TEMPERATURE,
+                stream=True
+            )
+            return _stream_deltas(stream, lambda chunk: (chunk.choices[0].delta.content or "") if chunk.choices else None)
+        
+        full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
+        if client_name == 'cohere':
+            client = self.clients['cohere']
+            params = dict(prompt=full_prompt, max_tokens=self.MAX_TOKENS, temperature=self.TEMPERATURE)
+            if hasattr(client, 'generate_stream'):
+                # cohere>=5: an event stream; text arrives in "text-generation" events
+                stream = client.generate_stream(**params)
+                return _stream_deltas(
+                    stream, lambda event: event.text if getattr(event, 'event_type', None) == 'text-generation' else None
+                )
+            # cohere 4.x streams tokens from generate()
+            stream = client.generate(stream=True, **params)
+            return _stream_deltas(stream, lambda token: token.text)
+        if client_name == 'gemini':
+            genai = self.clients['gemini']
+            stream = genai.GenerativeModel(self.PROVIDER_MODELS['gemini']).generate_content(full_prompt, stream=True)
+            return _stream_deltas(stream, lambda chunk: chunk.text)
+        raise Exception(f"Unknown LLM provider: {client_name}")
+    
+    def _call_openai(self, prompt: str, system_prompt: str, model: str, json_mode: bool = False) -> str:
+        """Call OpenAI API using the new 1.0.0+ format."""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        
+        # Use the stored OpenAI client
+        client = self.clients['openai']
+        
+        response = client.chat.completions.create(
+            model=self._resolve_model('openai', model),
+            messages=messages,
+            max_tokens=self.MAX_TOKENS,
+            temperature=self.TEMPERATURE,
+            **self._response_format('openai', model, json_mode)
+        )
+        return response.choices[0].message.content
+    
+    def _call_cohere(self, prompt: str, system_prompt: str) -> str:
+        """Call Cohere API."""
+        full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
+        response = self.clients['cohere'].generate(
+            prompt=full_prompt,
+            max_tokens=self.MAX_TOKENS,
+            temperature=self.TEMPERATURE
+        )
+        return response.generations[0].text
+    
+    def _call_groq(self, prompt: str, system_prompt: str, json_mode: bool = False) -> str:
+        """Call Groq API."""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        
+        response = self.clients['groq'].chat.completions.create(
+            model=self.PROVIDER_MODELS['groq'],
+            messages=messages,
+            max_tokens=self.MAX_TOKENS,
+            temperature=self.TEMPERATURE,
+            **self._response_format('groq', "auto", json_mode)
+        )
+        return response.choices[0].message.content
+    
+    def _call_gemini(self, prompt: str, system_prompt: str, json_mode: bool = False) -> str:
+        """Call Gemini API."""
+        genai = self.clients['gemini']
+        # Use the latest Gemini models
+        try:
+            model = genai.GenerativeModel('gemini-2.5-pro')
+        except Exception:
+            model = genai.GenerativeModel('gemini-2.5-flash')
+        
+        full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
+        response = model.generate_content(full_prompt, **self._response_format('gemini', "auto", json_mode))
+        return response.text
+    
+    async def agenerate_response(self, prompt: str, system_prompt: str = "", model: str = "auto",
+                                 json_mode: bool = False) -> str:
+        """
+        Async counterpart of ``generate_response`` built on the providers' native
+        async clients, so many requests can be in flight on one event loop.
+        Same priority order and hedging behaviour as the sync API.
+        """
+        if not self.async_client_factories:
+            raise Exception("No LLM clients available. Please add an API key.")
+        
+        providers = [name for name in self.CLIENT_ORDER if name in self.async_client_factories]
+        cached = self._cached_response(providers, prompt, system_prompt, model, json_mode)
+        if cached is not None:
+            return cached
+        providers = self._healthy_providers(providers)
+        if self.hedge_after_seconds:
+            return await self._agenerate_hedged(providers, prompt, system_prompt, model, json_mode)
+        
+        for client_name in providers:
+            try:
+                return await self._acall_provider(client_name, prompt, system_prompt, model, json_mode)
+            except CircuitOpenError:
+                continue
+            except Exception as e:
+                st.warning(f"Error with {client_name}: {e}")
+                continue
+        
+        raise Exception("All LLM clients failed. Please check your API keys.")
+    
+    async def _agenerate_hedged(self, providers: List[str], prompt: str, system_prompt: str, model: str,
+                                json_mode: bool = False) -> str:
+        """Async hedged dispatch; unlike threads, losing calls are truly cancelled."""
+        pending = {}
+        errors = []
+        remaining = list(providers)
+        
+        def launch_next():
+            client_name = remaining.pop(0)
+            task = asyncio.ensure_future(self._acall_provider(client_name, prompt, system_prompt, model, json_mode))
+            pending[task] = client_name
+        
+        try:
+            launch_next()
+            while pending:
+                timeout = self.hedge_after_seconds if remaining else None
+                done, _ = await asyncio.wait(list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch_next()
+                    continue
+                for task in done:
+                    client_name = pending.pop(task)
+                    try:
+                        return task.result()
+                    except Exception as e:
+                        errors.append((client_name, e))
+                        if remaining:
+                            launch_next()
+        finally:
+            for task in pending:
+                task.cancel()
+            for client_name, e in errors:
+                if not isinstance(e, CircuitOpenError):
+                    st.warning(f"Error with {client_name}: {e}")
+        
+        raise Exception("All LLM clients failed. Please check your API keys.")
+    
+    async def _acall_provider(self, client_name: str, prompt: str, system_prompt: str, model: str,
+                             json_mode: bool = False) -> str:
+        """Dispatch a single async call to the named provider and cache the response."""
+        if client_name == 'openai':
+            call = lambda: self._acall_openai(prompt, system_prompt, model, json_mode)
+        elif client_name == 'cohere':
+            call = lambda: self._acall_cohere(prompt, system_prompt)
+        elif client_name == 'groq':
+            call = lambda: self._acall_groq(prompt, system_prompt, json_mode)
+        elif client_name == 'gemini':
+            call = lambda: self._acall_gemini(prompt, system_prompt, json_mode)
+        else:
+            raise Exception(f"Unknown LLM provider: {client_name}")
+        breaker = get_circuit_breaker(client_name, self.config)
+        if not breaker.allow():
+            raise CircuitOpenError(f"{client_name} circuit is open")
+        limiter = get_provider_limiter(client_name, self.config)
+        started = 0.0
+
+        async def attempt():
+            # Latency covers the provider attempt only, not rate-limit waits or retry backoff
+            nonlocal started
+            started = time.perf_counter()
+            return await call()
+
+        try:
+            response = await limiter.acall(attempt, self._estimate_tokens(prompt, system_prompt))
+        except Exception:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # Cancelled (e.g. lost a hedge race): no verdict on the provider
+            breaker.release()
+            raise
+        breaker.record_success(time.perf_counter() - started)
+        self._store_response(client_name, prompt, system_prompt, model, response, json_mode)
+        return response
+    
+    async def _acall_openai(self, prompt: str, system_prompt: str, model: str, json_mode: bool = False) -> str:
+        """Call OpenAI API with the async client."""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        
+        response = await self._async_client('openai').chat.completions.create(
+            model=self._resolve_model('openai', model),
+            messages=messages,
+            max_tokens=self.MAX_TOKENS,
+            temperature=self.TEMPERATURE,
+            **self._response_format('openai', model, json_mode)
+        )
+        return response.choices[0].message.content
+    
+    async def _acall_cohere(self, prompt: str, system_prompt: str) -> str:
+        """Call Cohere API with the async client."""
+        full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
+        response = await self._async_client('cohere').generate(
+            prompt=full_prompt,
+            max_tokens=self.MAX_TOKENS,
+            temperature=self.TEMPERATURE
+        )
+        return response.generations[0].text
+    
+    async def _acall_groq(self, prompt: str, system_prompt: str, json_mode: bool = False) -> str:
+        """Call Groq API with the async client."""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        
+        response = await self._async_client('groq').chat.completions.create(
+            model=self.PROVIDER_MODELS['groq'],
+            messages=messages,
+            max_tokens=self.MAX_TOKENS,
+            temperature=self.TEMPERATURE,
+            **self._response_format('groq', "auto", json_mode)
+        )
+        return response.choices[0].message.content
+    
+    async def _acall_gemini(self, prompt: str, system_prompt: str, json_mode: bool = False) -> str:
+        """Call Gemini API with its async generate_content."""
+        genai = self._async_client('gemini')
+        try:
+            model = genai.GenerativeModel('gemini-2.5-pro')
+        except Exception:
+            model = genai.GenerativeModel('gemini-2.5-flash')
+        
+        full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
+        response = await model.generate_content_async(full_prompt, **self._response_format('gemini', "auto", json_mode))
+        return response.text
+    
+    def _healthy_providers(self, providers: List[str]) -> List[str]:
+        """Providers whose circuit is closed (or due a probe), ordered by health score."""
+        healthy = order_by_health(providers, self.config)
+        if not healthy:
+            raise Exception("All LLM providers are temporarily unavailable. Please try again shortly.")
+        return healthy
+    
+    def supports_json_mode(self, client_name: str, model: str = "auto") -> bool:
+        """Whether ``client_name`` can be asked to emit a bare JSON object."""
+        if client_name == 'openai':
+            return self._resolve_model('openai', model) not in self.OPENAI_NO_JSON_MODE
+        if client_name == 'gemini':
+            return self.gemini_json_mode
+        return client_name == 'groq'
+    
+    def _response_format(self, client_name: str, model: str, json_mode: bool) -> Dict[str, Any]:
+        """Extra request kwargs that switch a provider into JSON mode (empty when unsupported)."""
+        if not (json_mode and self.json_mode and self.supports_json_mode(client_name, model)):
+            return {}
+        if client_name == 'gemini':
+            return {"generation_config": {"response_mime_type": "application/json"}}
+        return {"response_format": {"type": "json_object"}}
+    
+    def _estimate_tokens(self, prompt: str, system_prompt: str) -> int:
+        """Rough token cost for rate limiting: ~4 characters per token plus the completion budget."""
+        return (len(prompt) + len(system_prompt)) // 4 + self.MAX_TOKENS
+    
+    # --- Response cache ---
+    def _resolve_model(self, client_name: str, model: str) -> str:
+        """Concrete model name sent to ``client_name`` (only OpenAI honours an explicit model)."""
+        if client_name == 'openai' and model != "auto":
+            return model
+        return self.PROVIDER_MODELS[client_name]
+    
+    def _cache_key(self, client_name: str, prompt: str, system_prompt: str, model: str,
+                   json_mode: bool = False) -> str:
+        response_format = "json" if self._response_format(client_name, model, json_mode) else "text"
+        return response_cache_key(
+            client_name, self._resolve_model(client_name, model), system_prompt, prompt,
+            self.TEMPERATURE, self.MAX_TOKENS, response_format
+        )
+    
+    def _cached_response(self, providers: List[str], prompt: str, system_prompt: str, model: str,
+                         json_mode: bool = False) -> Optional[str]:
+        """Return a cached response from the highest-priority provider that has one."""
+        if self.response_cache is None:
+            return None
+        return self.response_cache.lookup(
+            [self._cache_key(client_name, prompt, system_prompt, model, json_mode) for client_name in providers]
+        )
+    
+    def _store_response(self, client_name: str, prompt: str, system_prompt: str, model: str, response: str,
+                        json_mode: bool = False) -> None:
+        if self.response_cache is not None and response:
+            self.response_cache.set(self._cache_key(client_name, prompt, system_prompt, model, json_mode), response)
+    
+    def _clause_result_key(self, kind: str, clause_text: str) -> str:
+        # Keyed by the single-clause prompt, independent of how the clause was batched;
+        # editing the prompt templates invalidates stored results
+        user_prompt, system_prompt = {'risk': self._risk_prompts}[kind](clause_text)
+        return response_cache_key("clause-result", kind, system_prompt, user_prompt, self.TEMPERATURE, self.MAX_TOKENS)
+    
+    def _cached_clause_result(self, kind: str, clause_text: str) -> Optional[Dict[str, Any]]:
+        """A previously stored per-clause analysis, or None."""
+        if self.response_cache is None:
+            return None
+        cached = self.response_cache.get(self._clause_result_key(kind, clause_text))
+        if cached is None:
+            return None
+        try:
+            return json.loads(cached)
+        except ValueError:
+            return None
+    
+    def _store_clause_result(self, kind: str, clause_text: str, result: Dict[str, Any]) -> None:
+        if self.response_cache is not None:
+            self.response_cache.set(self._clause_result_key(kind, clause_text), json.dumps(result))
+    
+    def invalidate_cached_response(self, prompt: str, system_prompt: str = "", model: str = "auto",
+                                   json_mode: bool = False) -> None:
+        """Drop cached responses for this request from every provider."""
+        if self.response_cache is None:
+            return
+        for client_name in self.CLIENT_ORDER:
+            self.response_cache.delete(self._cache_key(client_name, prompt, system_prompt, model, json_mode))
+    
+    # --- Structured output ---
+    def _structured(self, user_prompt: str, system_prompt: str, schema: Schema) -> Dict[str, Any]:
+        """
+        Request a JSON analysis in provider JSON mode and validate it against
+        ``schema``. An invalid response is evicted from the cache and gets one
+        targeted repair call (bad output + error + schema) before giving up.
+        """
+        response = self.generate_response(user_prompt, system_prompt, json_mode=True)
+        try:
+            return parse_structured(response, schema)
+        except StructuredOutputError as e:
+            self.invalidate_cached_response(user_prompt, system_prompt, json_mode=True)
+            repair_prompt, repair_system = repair_prompts(response, schema, e)
+        repaired = self.generate_response(repair_prompt, repair_system, json_mode=True)
+        return self._parse_repaired(repaired, repair_prompt, repair_system, schema)
+    
+    async def _astructured(self, user_prompt: str, system_prompt: str, schema: Schema) -> Dict[str, Any]:
+        """Async counterpart of ``_structured``."""
+        response = await self.agenerate_response(user_prompt, system_prompt, json_mode=True)
+        try:
+            return parse_structured(response, schema)
+        except StructuredOutputError as e:
+            self.invalidate_cached_response(user_prompt, system_prompt, json_mode=True)
+            repair_prompt, repair_system = repair_prompts(response, schema, e)
+        repaired = await self.agenerate_response(repair_prompt, repair_system, json_mode=True)
+        return self._parse_repaired(repaired, repair_prompt, repair_system, schema)
+    
+    def _parse_repaired(self, response: str, repair_prompt: str, repair_system: str, schema: Schema) -> Dict[str, Any]:
+        try:
+            return parse_structured(response, schema)
+        except StructuredOutputError:
+            self.invalidate_cached_response(repair_prompt, repair_system, json_mode=True)
+            raise Exception("Failed to parse AI response. Please try again.")
+    
+    # --- Prompts & parsing (shared by the sync and async APIs) ---
+    @staticmethod
+    def _full_sections(sections: Optional[List[str]], frameworks: Optional[Dict[str, str]]) -> List[str]:
+        """Validate the requested sections of a fused analysis, in canonical order."""
+        if sections is None:
+            sections = [name for name in SECTION_SCHEMAS if name != 'compliance' or frameworks]
+        unknown = [name for name in sections if name not in SECTION_SCHEMAS]
+        if unknown:
+            raise ValueError(f"Unknown analysis sections: {', '.join(unknown)}")
+        if 'compliance' in sections and not frameworks:
+            raise ValueError("Compliance analysis requires at least one framework.")
+        if not sections:
+            raise ValueError("No analysis sections requested.")
+        return [name for name in SECTION_SCHEMAS if name in sections]
+    
+    @staticmethod
+    def _full_prompts(clause_text: str, sections: List[str], frameworks: Dict[str, str]):
+        """Return (user_prompt, system_prompt) for a fused multi-section clause analysis."""
+        structures = {
+            'risk': """
+            "risk": {
+                "risk_level": "high|medium|low",
+                "confidence": 85,
+                "explanation": "Why this clause is or is not risky...",
+                "key_risks": ["risk1", "risk2"],
+                "recommendations": ["rec1", "rec2"],
+                "clause_type": "indemnification|termination|confidentiality|payment|liability|general"
+            }""",
+            'metadata': """
+            "metadata": {
+                "effective_date": "January 15, 2024" or null,
+                "termination_notice": "30 days" or null,
+                "contract_value": "$500,000" or null,
+                "liability_cap": "$100,000" or null,
+                "payment_terms": "Net 30" or null,
+                "clause_type": "indemnification|termination|confidentiality|payment|liability|general",
+                "parties_mentioned": ["Client", "Provider"],
+                "jurisdiction": "California" or "Not specified"
+            }""",
+            'compliance': """
+            "compliance": {
+                "overall_score": 85,
+                "frameworks": {
+                    "<framework name>": {
+                        "compliance_level": "Compliant|Partial|Non-Compliant",
+                        "issues": ["issue1", "issue2"],
+                        "recommendations": ["rec1", "rec2"]
+                    }
+                }
+            }""",
+        }
+        guidance = {
+            'risk': """
+        Risk levels:
+        - HIGH: Contains unlimited liability, broad indemnification, severe penalties
+        - MEDIUM: Contains termination clauses, payment terms, standard legal provisions
+        - LOW: Contains standard confidentiality, governing law, or general terms""",
+            'metadata': """
+        Metadata: only extract information that is explicitly stated in the clause. Use null for missing information.""",
+            'compliance': """
+        Compliance levels:
+        - Compliant: Meets all requirements
+        - Partial: Meets some requirements but has gaps
+        - Non-Compliant: Significant compliance issues""",
+        }
+        system_prompt = f"""
+        You are an expert legal and compliance analyst reviewing contract clauses.
+        Analyze the provided contract clause and return ONLY a valid JSON response.
+        
+        IMPORTANT: Return ONLY the JSON object, no additional text, explanations, or markdown formatting.
+        
+        Required JSON structure:
+        {{{','.join(structures[name] for name in sections)}
+        }}
+        {''.join(guidance[name] for name in sections)}
+        
+        Be specific and provide actionable recommendations.
+        """
+        
+        framework_line = ""
+        if 'compliance' in sections:
+            framework_line = f"\n        Frameworks: {', '.join([f'{k} ({v})' for k, v in frameworks.items()])}\n"
+        user_prompt = f"""
+        Analyze this contract clause ({', '.join(sections)}):
+        {framework_line}
+        Clause: "{clause_text}"
+        
+        Return only valid JSON with the specified structure.
+        """
+        return user_prompt, system_prompt
+    
+    @staticmethod
+    def _risk_prompts(clause_text: str):
+        """Return (user_prompt, system_prompt) for clause risk analysis."""
         system_prompt = """
         You are an expert legal analyst specializing in contract risk assessment. 
         Analyze the provided contract clause and return ONLY a valid JSON response.
@@ -92,28 +945,31 @@ class LLMClient:
         
         Return only valid JSON with the specified structure.
         """
-        
-        response = self.generate_response(user_prompt, system_prompt)
-        
-        # Try to parse JSON response
-        try:
-            # Extract JSON from response (in case there's extra text)
-            json_start = response.find('{')
-            json_end = response.rfind('}') + 1
-            if json_start != -1 and json_end != 0:
-                json_str = response[json_start:json_end]
-                result = json.loads(json_str)
-                return result
-        except json.JSONDecodeError:
-            pass
-        
-        # If JSON parsing fails, raise an error
-        raise Exception("Failed to parse AI response. Please try again.")
+        return user_prompt, system_prompt
     
-    def extract_metadata(self, clause_text: str) -> Dict[str, Any]:
+    @staticmethod
+    def _risk_batch_prompts(clauses: List[str]):
+        """Return (user_prompt, system_prompt) for analyzing several clauses in one call."""
+        _, single_system_prompt = LLMClient._risk_prompts("")
+        system_prompt = single_system_prompt + """
+        You will receive several numbered clauses. Analyze each one independently and return ONLY
+        a JSON array with one object per clause, using the structure above plus a "clause_id" field
+        holding the clause number, e.g. [{"clause_id": 1, "risk_level": "high", ...}, ...].
         """
-        Extract metadata from clause using LLM.
+        
+        numbered = "\n\n".join(f'Clause {i}: "{clause}"' for i, clause in enumerate(clauses, 1))
+        user_prompt = f"""
+        Analyze each of these contract clauses for risk level:
+        
+        {numbered}
+        
+        Return only a valid JSON array with one object per clause.
         """
+        return user_prompt, system_prompt
+    
+    @staticmethod
+    def _metadata_prompts(clause_text: str):
+        """Return (user_prompt, system_prompt) for metadata extraction."""
         system_prompt = """
         You are an expert contract analyst. Extract key metadata from the contract clause and return a JSON response:
         
@@ -138,27 +994,11 @@ class LLMClient:
         
         Return only valid JSON with the specified structure.
         """
-        
-        response = self.generate_response(user_prompt, system_prompt)
-        
-        # Try to parse JSON response
-        try:
-            json_start = response.find('{')
-            json_end = response.rfind('}') + 1
-            if json_start != -1 and json_end != 0:
-                json_str = response[json_start:json_end]
-                result = json.loads(json_str)
-                return result
-        except json.JSONDecodeError:
-            pass
-        
-        # If JSON parsing fails, raise an error
-        raise Exception("Failed to parse AI response. Please try again.")
+        return user_prompt, system_prompt
     
-    def analyze_compliance(self, clause_text: str, frameworks: Dict[str, str]) -> Dict[str, Any]:
-        """
-        Analyze clause compliance against regulatory frameworks using LLM.
-        """
+    @staticmethod
+    def _compliance_prompts(clause_text: str, frameworks: Dict[str, str]):
+        """Return (user_prompt, system_prompt) for compliance analysis."""
         system_prompt = """
         You are an expert compliance analyst specializing in regulatory frameworks. 
         Analyze the provided contract clause against multiple compliance frameworks and return ONLY a valid JSON response.
@@ -199,120 +1039,48 @@ class LLMClient:
         
         Return ONLY valid JSON with the specified structure. No additional text or formatting.
         """
-        
-        response = self.generate_response(user_prompt, system_prompt)
-        
-        # Try to parse JSON response
-        try:
-            # Clean the response - remove any markdown formatting
-            cleaned_response = response.strip()
-            if cleaned_response.startswith('```json'):
-                cleaned_response = cleaned_response[7:]
-            if cleaned_response.endswith('```'):
-                cleaned_response = cleaned_response[:-3]
-            cleaned_response = cleaned_response.strip()
-            
-            # Try direct parsing first
-            result = json.loads(cleaned_response)
-            return result
-        except json.JSONDecodeError:
-            # Try to extract JSON from response
-            try:
-                json_start = response.find('{')
-                json_end = response.rfind('}') + 1
-                if json_start != -1 and json_end != 0:
-                    json_str = response[json_start:json_end]
-                    result = json.loads(json_str)
-                    return result
-            except json.JSONDecodeError as e:
-                st.error(f"JSON parsing failed. Response: {response[:200]}...")
-                st.error(f"JSON error: {e}")
-                raise Exception("Failed to parse AI response. Please try again.")
-    
-    def generate_response(self, prompt: str, system_prompt: str = "", model: str = "auto") -> str:
-        """
-        Generate response using available LLM clients in priority order:
-        1. OpenAI
-        2. Cohere
-        3. Groq
-        4. Gemini
-        """
-        if not self.clients:
-            raise Exception("No LLM clients available. Please add an API key.")
-        
-        # Try clients in priority order
-        client_order = ['openai', 'cohere', 'groq', 'gemini']
-        
-        for client_name in client_order:
-            if client_name in self.clients:
-                try:
-                    if client_name == 'openai':
-                        return self._call_openai(prompt, system_prompt, model)
-                    elif client_name == 'cohere':
-                        return self._call_cohere(prompt, system_prompt)
-                    elif client_name == 'groq':
-                        return self._call_groq(prompt, system_prompt)
-                    elif client_name == 'gemini':
-                        return self._call_gemini(prompt, system_prompt)
-                except Exception as e:
-                    st.warning(f"Error with {client_name}: {e}")
-                    continue
-        
-        raise Exception("All LLM clients failed. Please check your API keys.")
-    
-    def _call_openai(self, prompt: str, system_prompt: str, model: str) -> str:
-        """Call OpenAI API using the new 1.0.0+ format."""
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
-        
-        # Use the stored OpenAI client
-        client = self.clients['openai']
-        
-        response = client.chat.completions.create(
-            model=model if model != "auto" else "gpt-4",
-            messages=messages,
-            max_tokens=1000,
-            temperature=0.3  # Lower temperature for more consistent legal analysis
-        )
-        return response.choices[0].message.content
-    
-    def _call_cohere(self, prompt: str, system_prompt: str) -> str:
-        """Call Cohere API."""
-        full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
-        response = self.clients['cohere'].generate(
-            prompt=full_prompt,
-            max_tokens=1000,
-            temperature=0.3
-        )
-        return response.generations[0].text
-    
-    def _call_groq(self, prompt: str, system_prompt: str) -> str:
-        """Call Groq API."""
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
-        
-        response = self.clients['groq'].chat.completions.create(
-            model="llama3-8b-8192",
-            messages=messages,
-            max_tokens=1000,
-            temperature=0.3
-        )
-        return response.choices[0].message.content
-    
-    def _call_gemini(self, prompt: str, system_prompt: str) -> str:
-        """Call Gemini API."""
-        # Use the latest Gemini models
-        try:
-            model = genai.GenerativeModel('gemini-2.5-pro')
-        except Exception:
-            model = genai.GenerativeModel('gemini-2.5-flash')
-        
-        full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
-        response = model.generate_content(full_prompt)
-        return response.text
-    
- 
\ No newline at end of file
+        return user_prompt, system_prompt
+
+
+def _gemini_supports_json_mode(genai) -> bool:
+    """Whether the SDK's GenerationConfig has ``response_mime_type`` (google-generativeai 0.5+)."""
+    config_type = getattr(getattr(genai, 'types', None), 'GenerationConfig', None)
+    fields = getattr(config_type, '__dataclass_fields__', None) or getattr(config_type, '__annotations__', None) or {}
+    return 'response_mime_type' in fields
+
+
+def _stream_deltas(stream, text_of: Callable[[Any], Optional[str]]) -> Iterator[str]:
+    """
+    Text deltas of an SDK stream (``text_of`` returns None for items without text).
+    The SDK stream is closed when iteration ends or stops early, releasing its
+    HTTP response instead of leaving it to garbage collection.
+    """
+    try:
+        for item in stream:
+            text = text_of(item)
+            if text is not None:
+                yield text
+    finally:
+        close = getattr(stream, 'close', None)
+        if close is not None:
+            close()
+
+
+_shared_clients: Dict[str, LLMClient] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def get_shared_llm_client(config: Optional[Dict[str, Any]] = None) -> LLMClient:
+    """
+    Process-wide LLMClient registry. Every session (and component) with the same
+    configuration gets the same client, so provider SDK clients, their HTTP
+    connection pools and the response cache are shared instead of rebuilt.
+    """
+    config = config if config is not None else st.session_state.get('config', {})
+    key = hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    with _shared_clients_lock:
+        client = _shared_clients.get(key)
+        if client is None:
+            client = LLMClient(config=config)
+            _shared_clients[key] = client
+        return client
@@ -0,0 +1,245 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, Optional
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at ``rate_per_minute``.
+
+    ``reserve`` never blocks: it takes the tokens (allowing the balance to go
+    negative) and returns how long the caller must wait before using them, so
+    the same bucket serves threads and coroutines and callers queue fairly in
+    arrival order.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """Take ``amount`` tokens; return seconds to wait before proceeding."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Requests larger than the bucket would otherwise wait forever
+            self._tokens -= min(amount, self.capacity)
+            return max(0.0, -self._tokens / self.rate)
+
+
+class ConcurrencySlots:
+    """
+    Cap on calls in flight, shared by threads and coroutines. Slots are granted
+    strictly in arrival order: a released slot passes straight to the oldest
+    waiter, and coroutines wait on a future instead of polling.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._in_use = 0
+        self._waiters: Deque[Callable[[], None]] = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self._try_take():
+                return
+            granted = threading.Event()
+            self._waiters.append(granted.set)
+        granted.wait()
+
+    async def aacquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._try_take():
+                return
+            future = loop.create_future()
+
+            def grant() -> None:
+                loop.call_soon_threadsafe(self._deliver, future)
+            self._waiters.append(grant)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                queued = grant in self._waiters
+                if queued:
+                    self._waiters.remove(grant)
+            if not queued and future.done() and not future.cancelled():
+                # Granted just before the cancellation landed; pass the slot on
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            if not self._waiters:
+                self._in_use -= 1
+                return
+            # The slot moves to the next waiter without ever becoming free
+            grant = self._waiters.popleft()
+        grant()
+
+    def _try_take(self) -> bool:
+        if self._in_use < self.limit and not self._waiters:
+            self._in_use += 1
+            return True
+        return False
+
+    def _deliver(self, future: "asyncio.Future") -> None:
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+
+# SDK exception classes that mean "throttled" even when no HTTP status is attached
+# (openai/groq RateLimitError, cohere v5 TooManyRequestsError, google ResourceExhausted)
+_RATE_LIMIT_ERRORS = frozenset({"RateLimitError", "TooManyRequestsError", "ResourceExhausted"})
+
+
+def _retry_status(error: Exception) -> Optional[int]:
+    """HTTP status of a provider SDK error, if it has one."""
+    for obj in (error, getattr(error, "response", None)):
+        status = getattr(obj, "status_code", None) or getattr(obj, "http_status", None)
+        if isinstance(status, int):
+            return status
+    if any(cls.__name__ in _RATE_LIMIT_ERRORS for cls in type(error).__mro__):
+        return 429
+    return None
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class ProviderLimiter:
+    """
+    Per-provider governor: requests/min and tokens/min buckets, a cap on calls
+    in flight, and exponential backoff with full jitter on 429/5xx responses.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 max_concurrency: Optional[int] = None, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_cap: float = 20.0):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._slots = ConcurrencySlots(max_concurrency) if max_concurrency else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+    def call(self, fn: Callable[[], Any], estimated_tokens: int = 0) -> Any:
+        """Run ``fn`` within the provider's limits, retrying throttled/5xx failures."""
+        for attempt in range(self.max_retries + 1):
+            time.sleep(self._reserve(estimated_tokens))
+            if self._slots:
+                self._slots.acquire()
+            try:
+                return fn()
+            except Exception as e:
+                delay = self._backoff(e, attempt)
+                if delay is None:
+                    raise
+            finally:
+                if self._slots:
+                    self._slots.release()
+            time.sleep(delay)
+
+    def stream(self, open_stream: Callable[[], Iterator[Any]], estimated_tokens: int = 0) -> Iterator[Any]:
+        """
+        ``call`` for a streaming response: opening the stream is retried like a
+        call, and the concurrency slot is held until the stream is exhausted or
+        closed, so long streams count against the provider's concurrency cap.
+        """
+        for attempt in range(self.max_retries + 1):
+            time.sleep(self._reserve(estimated_tokens))
+            if self._slots:
+                self._slots.acquire()
+            try:
+                stream = open_stream()
+            except Exception as e:
+                if self._slots:
+                    self._slots.release()
+                delay = self._backoff(e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            try:
+                yield from stream
+            finally:
+                if self._slots:
+                    self._slots.release()
+            return
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]], estimated_tokens: int = 0) -> Any:
+        """Async counterpart of ``call``; waits without blocking the event loop."""
+        for attempt in range(self.max_retries + 1):
+            await asyncio.sleep(self._reserve(estimated_tokens))
+            if self._slots:
+                await self._slots.aacquire()
+            try:
+                return await fn()
+            except Exception as e:
+                delay = self._backoff(e, attempt)
+                if delay is None:
+                    raise
+            finally:
+                if self._slots:
+                    self._slots.release()
+            await asyncio.sleep(delay)
+
+    def _reserve(self, estimated_tokens: int) -> float:
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens and estimated_tokens:
+            wait = max(wait, self.tokens.reserve(estimated_tokens))
+        return wait
+
+    def _backoff(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying, or None if the error is not retryable."""
+        status = _retry_status(error)
+        if attempt >= self.max_retries or status is None or not (status == 429 or status >= 500):
+            return None
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_cap)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_provider_limiter(provider: str, config: Dict[str, Any]) -> ProviderLimiter:
+    """
+    Process-wide limiter for ``provider`` so every session draws from one quota.
+    Limits come from config keys ``<provider>_rpm``, ``<provider>_tpm`` and
+    ``<provider>_max_concurrency``; unset limits are not enforced.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            def number(key, cast):
+                value = config.get(f"{provider}_{key}")
+                return cast(value) if value else None
+            limiter = ProviderLimiter(
+                requests_per_minute=number("rpm", float),
+                tokens_per_minute=number("tpm", float),
+                max_concurrency=number("max_concurrency", int),
+                max_retries=int(config.get("llm_max_retries") or 3)
+            )
+            _limiters[provider] = limiter
+        return limiter
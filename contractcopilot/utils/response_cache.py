@@ -0,0 +1,173 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+def response_cache_key(provider: str, model: str, system_prompt: str, prompt: str,
+                       temperature: float, max_tokens: int, response_format: str = "text") -> str:
+    """Stable hash of everything that determines an LLM completion."""
+    fields = [provider, model, system_prompt, prompt, temperature, max_tokens]
+    if response_format != "text":
+        # Plain-text keys are unchanged so existing cache entries stay valid
+        fields.append(response_format)
+    payload = json.dumps(fields, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(ABC):
+    """
+    Base class for LLM response caches.
+    Subclasses implement ``_get``/``_set``/``_delete``; hit/miss counters live here.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._get(key)
+        with self._counter_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def lookup(self, keys: List[str]) -> Optional[str]:
+        """First cached value among ``keys``, counted as a single hit or miss."""
+        for key in keys:
+            value = self._get(key)
+            if value is not None:
+                break
+        else:
+            value = None
+        with self._counter_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self._set(key, value)
+
+    def delete(self, key: str) -> None:
+        self._delete(key)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def _set(self, key: str, value: str) -> None:
+        ...
+
+    @abstractmethod
+    def _delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class MemoryResponseCache(ResponseCache):
+    """In-process LRU cache with an optional time-to-live per entry."""
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: Optional[float] = None):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key: str, value: str) -> None:
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteResponseCache(ResponseCache):
+    """Disk-backed cache shared across processes and restarts."""
+
+    def __init__(self, path: str, ttl_seconds: Optional[float] = None):
+        super().__init__()
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        if self.ttl_seconds and created_at + self.ttl_seconds < time.time():
+            self._delete(key)
+            return None
+        return value
+
+    def _set(self, key: str, value: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+
+    def _delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+def build_response_cache(config: Dict) -> Optional[ResponseCache]:
+    """Create the cache selected in config (SQLite if a path is set, otherwise in-memory)."""
+    if config.get('response_cache') == 'off':
+        return None
+    ttl = config.get('response_cache_ttl_seconds')
+    if config.get('response_cache_path'):
+        return SQLiteResponseCache(config['response_cache_path'], ttl_seconds=ttl)
+    return MemoryResponseCache(ttl_seconds=ttl)
@@ -0,0 +1,249 @@
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+
+class StructuredOutputError(Exception):
+    """LLM output could not be parsed or did not match the expected schema."""
+
+
+@dataclass(frozen=True)
+class Field:
+    """Expected type of one JSON field, with optional enum and nested schema."""
+    type: Union[type, Tuple[type, ...]]
+    required: bool = True
+    nullable: bool = False
+    enum: Optional[Tuple[str, ...]] = None
+    values: Optional[Dict[str, "Field"]] = None  # schema applied to each value of a dict field
+    fields: Optional[Dict[str, "Field"]] = None  # schema of a nested object field
+
+
+Schema = Dict[str, Field]
+
+RISK_SCHEMA: Schema = {
+    "risk_level": Field(str, enum=("high", "medium", "low")),
+    "confidence": Field(int),
+    "explanation": Field(str),
+    "key_risks": Field(list),
+    "recommendations": Field(list),
+    "clause_type": Field(str),
+}
+
+METADATA_SCHEMA: Schema = {
+    "effective_date": Field(str, nullable=True),
+    "termination_notice": Field(str, nullable=True),
+    "contract_value": Field(str, nullable=True),
+    "liability_cap": Field(str, nullable=True),
+    "payment_terms": Field(str, nullable=True),
+    "clause_type": Field(str, nullable=True),
+    "parties_mentioned": Field(list, required=False),
+    "jurisdiction": Field(str, nullable=True),
+}
+
+FRAMEWORK_SCHEMA: Schema = {
+    "compliance_level": Field(str, enum=("Compliant", "Partial", "Non-Compliant")),
+    "issues": Field(list),
+    "recommendations": Field(list),
+}
+
+COMPLIANCE_SCHEMA: Schema = {
+    "overall_score": Field(int),
+    "frameworks": Field(dict, values=FRAMEWORK_SCHEMA),
+}
+
+# Sections of a fused clause analysis, keyed as they appear in the response
+SECTION_SCHEMAS: Dict[str, Schema] = {
+    "risk": RISK_SCHEMA,
+    "metadata": METADATA_SCHEMA,
+    "compliance": COMPLIANCE_SCHEMA,
+}
+
+
+def full_analysis_schema(sections) -> Schema:
+    """Schema for a fused analysis response holding one object per requested section."""
+    unknown = [name for name in sections if name not in SECTION_SCHEMAS]
+    if unknown:
+        raise ValueError(f"Unknown analysis sections: {', '.join(unknown)}")
+    return {name: Field(dict, fields=SECTION_SCHEMAS[name]) for name in sections}
+
+
+def parse_structured(response: str, schema: Schema) -> Dict[str, Any]:
+    """Parse an LLM response into a dict and validate it against ``schema``."""
+    data = parse_json_tolerant(response, expect=dict)
+    return validate(data, schema)
+
+
+def validate(data: Dict[str, Any], schema: Schema, path: str = "") -> Dict[str, Any]:
+    """
+    Check ``data`` against ``schema``, coercing harmless mismatches (numeric
+    strings, enum casing, scalars where a list is expected). Raises
+    StructuredOutputError listing every problem found.
+    """
+    if not isinstance(data, dict):
+        raise StructuredOutputError(f"{path or 'response'}: expected an object")
+    problems = []
+    result = dict(data)
+    for name, field in schema.items():
+        where = f"{path}{name}"
+        if name not in data:
+            if field.required and not field.nullable:
+                problems.append(f"{where}: missing")
+            elif field.nullable:
+                result[name] = None
+            continue
+        try:
+            result[name] = _coerce(data[name], field, where)
+        except StructuredOutputError as e:
+            problems.append(str(e))
+    if problems:
+        raise StructuredOutputError("; ".join(problems))
+    return result
+
+
+def _coerce(value: Any, field: Field, where: str) -> Any:
+    if value is None or (isinstance(value, str) and value.strip().lower() in ("null", "none", "")):
+        if field.nullable:
+            return None
+        if value is None:
+            raise StructuredOutputError(f"{where}: must not be null")
+    if field.type is int and not isinstance(value, bool):
+        if isinstance(value, (int, float)):
+            return int(round(value))
+        match = re.fullmatch(r"\s*(-?\d+(?:\.\d+)?)\s*%?\s*", str(value))
+        if match:
+            return int(round(float(match.group(1))))
+        raise StructuredOutputError(f"{where}: expected a number, got {value!r}")
+    if field.type is list and not isinstance(value, list):
+        return [value]
+    if not isinstance(value, field.type):
+        raise StructuredOutputError(f"{where}: expected {getattr(field.type, '__name__', field.type)}")
+    if field.enum:
+        for option in field.enum:
+            if str(value).strip().lower() == option.lower():
+                return option
+        raise StructuredOutputError(f"{where}: expected one of {', '.join(field.enum)}, got {value!r}")
+    if field.values is not None:
+        return {key: validate(item, field.values, f"{where}.{key}.") for key, item in value.items()}
+    if field.fields is not None:
+        return validate(value, field.fields, f"{where}.")
+    return value
+
+
+def parse_json_tolerant(text: str, expect: type = dict) -> Any:
+    """
+    Extract the first JSON object (or array) from LLM output. Handles code fences,
+    prose around the JSON, trailing commas and truncated output (unterminated
+    strings and brackets are closed) before giving up.
+    """
+    if not text:
+        raise StructuredOutputError("empty response")
+    opener = "{" if expect is dict else "["
+    start = text.find(opener)
+    if start == -1:
+        raise StructuredOutputError(f"no JSON {'object' if expect is dict else 'array'} in response")
+    try:
+        # raw_decode stops at the end of the first value, ignoring trailing prose
+        value, _ = json.JSONDecoder().raw_decode(text, start)
+    except json.JSONDecodeError:
+        fragment = _strip_trailing_fence(text[start:])
+        try:
+            value = json.loads(_close_truncated(_drop_trailing_commas(fragment)))
+        except json.JSONDecodeError as e:
+            raise StructuredOutputError(f"invalid JSON: {e}")
+    if not isinstance(value, expect):
+        raise StructuredOutputError(f"expected JSON {'object' if expect is dict else 'array'}")
+    return value
+
+
+def _strip_trailing_fence(fragment: str) -> str:
+    fence = fragment.rfind("```")
+    return fragment[:fence] if fence != -1 else fragment
+
+
+def _drop_trailing_commas(fragment: str) -> str:
+    """Remove commas that directly precede a closing bracket, leaving string contents alone."""
+    parts = []
+    last = 0
+    comma = None  # position of the last comma outside strings, until something else follows it
+    for i, ch in _outside_strings(fragment):
+        if ch.isspace():
+            continue
+        if ch in "}]" and comma is not None:
+            parts.append(fragment[last:comma])
+            last = comma + 1
+        comma = i if ch == "," else None
+    parts.append(fragment[last:])
+    return "".join(parts)
+
+
+def _outside_strings(fragment: str) -> Iterator[Tuple[int, str]]:
+    """``(index, char)`` for each character outside string literals; the quotes themselves are included."""
+    in_string = escaped = False
+    for i, ch in enumerate(fragment):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+                yield i, ch
+            continue
+        if ch == '"':
+            in_string = True
+        yield i, ch
+
+
+def _close_truncated(fragment: str) -> str:
+    """Cut ``fragment`` at the end of its first JSON value, or close whatever is left open."""
+    stack = []
+    in_string = False
+    for i, ch in _outside_strings(fragment):
+        if ch == '"':
+            in_string = not in_string
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                return fragment[:i + 1]
+    tail = fragment + ('"' if in_string else "")
+    tail = re.sub(r'[,:]\s*$', "", tail.rstrip())
+    # A dangling key with no value ("key") inside an object cannot be completed
+    if stack and stack[-1] == "}" and re.search(r'[{,]\s*"[^"]*"$', tail):
+        tail = re.sub(r',?\s*"[^"]*"$', "", tail)
+    return tail + "".join(reversed(stack))
+
+
+def repair_prompts(bad_response: str, schema: Schema, error: Exception) -> Tuple[str, str]:
+    """Return (user_prompt, system_prompt) for a single targeted JSON repair call."""
+    system_prompt = (
+        "You repair malformed JSON. Return ONLY a valid JSON object, with no markdown "
+        "or commentary. Keep the original content; only fix structure, types and missing fields."
+    )
+    user_prompt = (
+        f"Required fields: {json.dumps(describe_schema(schema))}\n\n"
+        f"Problem: {error}\n\n"
+        f"Malformed response:\n{bad_response[:6000]}\n\n"
+        "Return the corrected JSON object."
+    )
+    return user_prompt, system_prompt
+
+
+def describe_schema(schema: Schema) -> Dict[str, Any]:
+    """Compact, human-readable description of a schema for prompts."""
+    described = {}
+    for name, field in schema.items():
+        if field.values is not None:
+            described[name] = {"<name>": describe_schema(field.values)}
+            continue
+        if field.fields is not None:
+            described[name] = describe_schema(field.fields)
+            continue
+        type_name = field.type.__name__ if isinstance(field.type, type) else "value"
+        if field.enum:
+            type_name = "|".join(field.enum)
+        described[name] = type_name + (" or null" if field.nullable else "")
+    return described
@@ -2,9 +2,7 @@ import streamlit as st
 import json
 import time
 from typing import Dict, Any, List, Optional
-import google.generativeai as genai
-import openai
-import cohere
+# Provider SDKs are imported in setup_clients, only for providers with an API key
 
 class LLMClient:
     def __init__(self):
@@ -28,6 +26,7 @@ class LLMClient:
         # Setup Gemini (Priority 2)
         if self.config.get('gemini_api_key'):
             try:
+                import google.generativeai as genai
                 genai.configure(api_key=self.config['gemini_api_key'])
                 self.clients['gemini'] = genai
             except Exception:
@@ -45,6 +44,7 @@ class LLMClient:
         # Setup Cohere (Priority 4)
         if self.config.get('cohere_api_key'):
             try:
+                import cohere
                 self.clients['cohere'] = cohere.Client(self.config['cohere_api_key'])
             except Exception:
                 pass
@@ -98,7 +98,7 @@ class LLMClient:
     
     def _call_gemini(self, prompt: str, system_prompt: str) -> str:
         """Call Gemini API."""
-        model = genai.GenerativeModel('gemini-pro')
+        model = self.clients['gemini'].GenerativeModel('gemini-pro')
         full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
         response = model.generate_content(full_prompt)
         return response.text